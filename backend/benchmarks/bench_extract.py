@@ -0,0 +1,87 @@
+"""
+Benchmark the live-scrape HTML extraction against the synthetic source.one fixture
+
+Compares the previous BeautifulSoup + full-text regex pass with the streaming
+PriceCardExtractor, reporting best-of-N wall time and tracemalloc peak.
+
+    python benchmarks/bench_extract.py --scale 50 --repeat 5
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import PriceCardExtractor, parse_price_ranges  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "source_one_synthetic.html")
+CHUNK_SIZE = 16 * 1024
+
+
+def load_page(scale: int) -> bytes:
+    """Fixture page with the price grid repeated `scale` times"""
+    html = open(FIXTURE, encoding="utf-8").read()
+    start = html.index('      <div class="col-md-3')
+    end = html.index('      </div>\n    </section>')
+    grid = html[start:end]
+    return (html[:start] + grid * scale + html[end:]).encode("utf-8")
+
+
+def legacy_extract(page: bytes):
+    """The parse previously done inline in scrape_source_one_live"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(page.decode("utf-8"), "html.parser")
+    soup.find_all(['div'], class_=lambda x: x and ('price' in x.lower() or 'card' in x.lower()))
+    all_text = soup.get_text()
+    price_patterns = re.findall(r'₹[\d,]+(?:\.[\d]+)?\s*-\s*₹[\d,]+(?:\.[\d]+)?', all_text)
+    polymer_patterns = re.findall(r'\b(?:HD|LD|PP|PVC|ABS|EVA|BOPP|PE|PPCP|PMMA|PC|PET)\s+[A-Z\s]+(?:MFI|MI|VA|IV|PIPE|GP|HM|K\d+)?\b', all_text)
+    return price_patterns, polymer_patterns
+
+
+def streaming_extract(page: bytes):
+    extractor = PriceCardExtractor()
+    for offset in range(0, len(page), CHUNK_SIZE):
+        extractor.feed(page[offset:offset + CHUNK_SIZE])
+    rows = extractor.close()
+    return rows, parse_price_ranges([row["price_range"] for row in rows])
+
+
+def measure(fn, page: bytes, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(page)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    fn(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, default=20, help="times to repeat the price grid")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per parser")
+    args = parser.parse_args()
+
+    page = load_page(args.scale)
+    rows, _ = streaming_extract(page)
+    print(f"page: {len(page) / 1024:.0f} KiB, {len(rows)} price cards")
+
+    results = {
+        "bs4 html.parser + regex": measure(legacy_extract, page, args.repeat),
+        "lxml streaming extractor": measure(streaming_extract, page, args.repeat),
+    }
+    for name, (seconds, peak) in results.items():
+        print(f"{name:<26} {seconds * 1000:9.1f} ms  peak {peak / 1024 / 1024:7.2f} MiB")
+    legacy, streaming = results.values()
+    print(f"speedup: {legacy[0] / streaming[0]:.1f}x, peak memory: {legacy[1] / streaming[1]:.1f}x lower")
+
+
+if __name__ == "__main__":
+    main()
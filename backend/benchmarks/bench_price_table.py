@@ -0,0 +1,103 @@
+"""
+Benchmark memory per row and build time of the columnar PriceTable
+
+Rows are synthetic grade x city combinations built from the stored
+source.one grades. The list-of-PolymerPrice layout it replaced is measured
+alongside it up to --models-max rows.
+
+    python benchmarks/bench_price_table.py --sizes 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import (  # noqa: E402
+    LOCATIONS,
+    PolymerPrice,
+    PriceTable,
+    format_price_range,
+    get_source_one_prices,
+    price_id,
+)
+
+
+def synthetic_columns(size: int):
+    grades = asyncio.run(get_source_one_prices()).product_names()
+    rng = np.random.default_rng(0)
+    min_prices = np.round(rng.uniform(70, 160, size), 2)
+    return {
+        "products": [f"{grades[(i // len(LOCATIONS)) % len(grades)]} G{i // len(LOCATIONS)}" for i in range(size)],
+        "locations": [LOCATIONS[i % len(LOCATIONS)] for i in range(size)],
+        "transit_times": ["1 DAY" if i % 3 else "2 DAYS" for i in range(size)],
+        "min_prices": min_prices,
+        "max_prices": np.round(min_prices + rng.uniform(1, 30, size), 2),
+        "price_changes": np.round(rng.uniform(-5, 3, size), 2),
+    }
+
+
+def build_table(columns, now):
+    return PriceTable.from_columns(last_updated=now, **columns)
+
+
+def build_models(columns, now):
+    return [
+        PolymerPrice(
+            id=price_id(product, location),
+            product=product,
+            price_range=format_price_range(low, high),
+            min_price=low,
+            max_price=high,
+            price_change=change,
+            price_change_percent=f"{change:+.2f}%",
+            transit_time=transit,
+            last_updated=now,
+            location=location,
+            currency="INR",
+        )
+        for product, location, transit, low, high, change in zip(
+            columns["products"], columns["locations"], columns["transit_times"],
+            columns["min_prices"].tolist(), columns["max_prices"].tolist(), columns["price_changes"].tolist(),
+        )
+    ]
+
+
+def measure(build, columns):
+    now = datetime.now()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build(columns, now)
+    elapsed = time.perf_counter() - started
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--models-max", type=int, default=100_000,
+                        help="largest size to also build as PolymerPrice models")
+    args = parser.parse_args()
+
+    print(f"{'rows':>9}  {'layout':<18} {'build':>10} {'bytes/row':>10}")
+    for size in args.sizes:
+        columns = synthetic_columns(size)
+        layouts = [("PriceTable", build_table)]
+        if size <= args.models_max:
+            layouts.append(("List[PolymerPrice]", build_models))
+        for name, build in layouts:
+            elapsed, retained = measure(build, columns)
+            print(f"{size:>9}  {name:<18} {elapsed * 1000:8.1f}ms {retained / size:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
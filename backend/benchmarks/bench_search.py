@@ -0,0 +1,100 @@
+"""
+Benchmark PriceSearchIndex queries on a synthetic snapshot
+
+Two synthetic snapshots: the grade x city rows of bench_price_table.py, and
+one distinct product name per row. Each query is timed (best of N) through the
+index and through the trigram-intersection product match it replaced.
+
+    python benchmarks/bench_search.py --size 100000 --repeat 20
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_price_table import synthetic_columns  # noqa: E402
+from server import EMPTY_ROWS, PriceSearchIndex, PriceTable  # noqa: E402
+
+QUERIES = [
+    {"q": "GRADE 123"},
+    {"q": "GRADE"},
+    {"q": "HD"},
+    {"q": "FILM"},
+    {"q": "G123"},
+    {"q": "HD FILM G12"},
+    {"q": "PP RAFFIA G1234"},
+    {"location": "Mumbai"},
+    {"min_price": 100, "max_price": 110},
+    {"q": "PP", "location": "Delhi", "min_price": 120, "sort": "-min_price"},
+    {"sort": "product"},
+]
+
+
+class LegacySearchIndex(PriceSearchIndex):
+    """The product match as it was: intersect every trigram's postings, then check each name in Python"""
+
+    def _product_matches(self, q: str) -> np.ndarray:
+        q = q.upper()
+        if len(q) <= 3:
+            product_ids = self.grams.get(q, EMPTY_ROWS)
+        else:
+            postings = sorted((self.grams.get(q[i:i + 3], EMPTY_ROWS) for i in range(len(q) - 2)), key=len)
+            product_ids = postings[0]
+            for posting in postings[1:]:
+                if not len(product_ids):
+                    break
+                product_ids = np.intersect1d(product_ids, posting, assume_unique=True)
+            product_ids = [pid for pid in product_ids if q in self.products[pid]]
+        if not len(product_ids):
+            return EMPTY_ROWS
+        matched = np.zeros(len(self.products), dtype=bool)
+        matched[product_ids] = True
+        return np.flatnonzero(matched[self.row_products])
+
+
+def distinct_columns(size: int):
+    """One product name per row ("GRADE 0".."GRADE n"), the worst case for the trigram postings"""
+    columns = synthetic_columns(size)
+    columns["products"] = [f"GRADE {i}" for i in range(size)]
+    return columns
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000, help="rows in the snapshot")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per query")
+    args = parser.parse_args()
+
+    for name, build in (("grade x city", synthetic_columns), ("one name per row", distinct_columns)):
+        table = PriceTable.from_columns(last_updated=datetime.now(), **build(args.size))
+        started = time.perf_counter()
+        index = PriceSearchIndex(table)
+        print(f"\n{name}: {args.size} rows, {len(index.products)} products, index built in "
+              f"{(time.perf_counter() - started) * 1000:.0f} ms")
+        legacy = LegacySearchIndex(table)
+        print(f"{'query':<52} {'rows':>7} {'index':>9} {'previous':>9}")
+        for query in QUERIES:
+            rows = index.search(**query)
+            assert rows.tolist() == legacy.search(**query).tolist()
+            seconds = best_of(lambda: index.search(**query), args.repeat)
+            previous = best_of(lambda: legacy.search(**query), args.repeat) if "q" in query else seconds
+            label = "&".join(f"{key}={value}" for key, value in query.items())
+            print(f"{label:<52} {len(rows):>7} {seconds * 1000:7.2f}ms {previous * 1000:7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Measure cold start: process spawn to the first 200 from the read API
+
+Starts `uvicorn server:app` in a fresh interpreter per run, polls until
+/api/prices answers 200 and reports spawn-to-first-200, the first
+request's own latency and the server's app_startup_duration_seconds
+(module import to ready). --max-ms exits non-zero when the median
+spawn-to-first-200 exceeds the budget.
+
+    python benchmarks/cold_start.py --runs 5 --max-ms 3000
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POLL_SECONDS = 0.005
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def cold_start(path: str, timeout: float) -> dict:
+    port = free_port()
+    env = {**os.environ, "MONGO_TIMEOUT_MS": os.environ.get("MONGO_TIMEOUT_MS", "500")}
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+            while True:
+                if time.perf_counter() - started > timeout:
+                    raise TimeoutError(f"no 200 from {path} within {timeout}s")
+                if process.poll() is not None:
+                    raise RuntimeError(f"server exited with code {process.returncode}")
+                request_started = time.perf_counter()
+                try:
+                    response = client.get(path)
+                except httpx.TransportError:
+                    time.sleep(POLL_SECONDS)
+                    continue
+                if response.status_code == 200:
+                    first_200 = time.perf_counter()
+                    break
+                time.sleep(POLL_SECONDS)
+            metrics = client.get("/metrics").text
+    finally:
+        process.terminate()
+        process.wait()
+    match = re.search(r"^app_startup_duration_seconds (\S+)$", metrics, re.MULTILINE)
+    return {
+        "first_200_ms": (first_200 - started) * 1000,
+        "first_request_ms": (first_200 - request_started) * 1000,
+        "startup_ms": float(match.group(1)) * 1000 if match else float("nan"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/api/prices")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", default="cold_start_results.json")
+    parser.add_argument("--max-ms", type=float, help="fail if the median spawn-to-first-200 exceeds this")
+    args = parser.parse_args()
+
+    runs = []
+    for run in range(args.runs):
+        result = cold_start(args.path, args.timeout)
+        runs.append(result)
+        print(f"run {run + 1}: first 200 after {result['first_200_ms']:.0f} ms "
+              f"(startup {result['startup_ms']:.0f} ms, first request {result['first_request_ms']:.1f} ms)")
+
+    summary = {key: round(float(np.median([run[key] for run in runs])), 1) for key in runs[0]}
+    print(f"median: first 200 after {summary['first_200_ms']} ms, startup {summary['startup_ms']} ms, "
+          f"first request {summary['first_request_ms']} ms")
+    with open(args.output, "w") as f:
+        json.dump({
+            "timestamp": datetime.now().isoformat(),
+            "path": args.path,
+            "python": sys.version.split()[0],
+            "median": summary,
+            "runs": runs,
+        }, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.max_ms is not None and summary["first_200_ms"] > args.max_ms:
+        print(f"REGRESSION first_200_ms {summary['first_200_ms']} > {args.max_ms}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
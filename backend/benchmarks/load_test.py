@@ -0,0 +1,157 @@
+"""
+Latency and throughput benchmark for the read API
+
+Runs the FastAPI app in-process through httpx's ASGITransport (default) or
+against a running server (--url), drives each endpoint at the given
+concurrency and reports p50/p95/p99 latency and requests per second.
+Results are written as JSON; --check compares them with thresholds.json
+and exits non-zero on a regression.
+
+    python benchmarks/load_test.py --concurrency 32 --requests 2000 --check
+    python benchmarks/load_test.py --url http://localhost:8001 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+import httpx
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+DEFAULT_THRESHOLDS = os.path.join(BENCH_DIR, "thresholds.json")
+
+ENDPOINTS = {
+    "prices": "/api/prices",
+    "search": "/api/prices/search?q=PP&min_price=90",
+    "polymer_types": "/api/polymer-types",
+    "price_history": "/api/price-history/HD FILM?interval=1d",
+}
+
+
+async def drive(client: httpx.AsyncClient, path: str, requests: int, concurrency: int):
+    """Issue `requests` GETs with `concurrency` workers; return latencies (s), errors, wall time"""
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def summarize(latencies, errors: int, elapsed: float) -> dict:
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "rps": round(len(latencies) / elapsed, 1),
+    }
+
+
+async def run(args) -> dict:
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=30.0)
+        lifespan = None
+    else:
+        from server import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+        lifespan = app.router.lifespan_context(app)
+        await lifespan.__aenter__()
+
+    results = {}
+    try:
+        async with client:
+            for name in args.endpoints:
+                path = ENDPOINTS[name]
+                # Warm caches so the run measures steady state
+                await drive(client, path, min(50, args.requests), args.concurrency)
+                results[name] = summarize(*await drive(client, path, args.requests, args.concurrency))
+                results[name]["path"] = path
+    finally:
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+    return results
+
+
+def check(results: dict, thresholds: dict):
+    """Threshold violations as human-readable strings"""
+    failures = []
+    for name, limits in thresholds.items():
+        result = results.get(name)
+        if result is None:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if metric in limits and result[metric] > limits[metric]:
+                failures.append(f"{name}: {metric} {result[metric]} > {limits[metric]}")
+        if "min_rps" in limits and result["rps"] < limits["min_rps"]:
+            failures.append(f"{name}: rps {result['rps']} < {limits['min_rps']}")
+        if result["errors"] > limits.get("max_errors", 0):
+            failures.append(f"{name}: {result['errors']} errors")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000, help="requests per endpoint")
+    parser.add_argument("--endpoints", nargs="+", choices=sorted(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS)
+    parser.add_argument("--check", action="store_true", help="exit 1 if any threshold is exceeded")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    print(f"{'endpoint':<15} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'errors':>7}")
+    for name, result in results.items():
+        print(f"{name:<15} {result['p50_ms']:>9} {result['p95_ms']:>9} {result['p99_ms']:>9} "
+              f"{result['rps']:>9} {result['errors']:>7}")
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "target": args.url or "in-process",
+        "concurrency": args.concurrency,
+        "python": platform.python_version(),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.check:
+        with open(args.thresholds) as f:
+            failures = check(results, json.load(f))
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            sys.exit(1)
+        print("All thresholds met")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,207 @@
+import time
+
+# Taken before the imports below so the startup gauge includes them
+PROCESS_STARTED = time.perf_counter()
+
+import base64
+import binascii
+import csv
+import gzip
+import importlib
+import importlib.util
+import io
+import mmap
 import os
-import requests
+import re
 import uuid
-from typing import List, Optional
-from fastapi import FastAPI, HTTPException
+import bisect
+import struct
+import sys
+import cProfile
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from typing import Awaitable, Callable, List, Optional, Tuple
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.routing import Match
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import random
 import asyncio
-import motor.motor_asyncio
-from pymongo import MongoClient
+import numpy as np
+import orjson
+
+# Heavy or path-specific modules (motor/pymongo, httpx, lxml, pyarrow) are
+# imported where they are used, and warmed off the event loop at startup
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # startup()/shutdown() live with the rest of the lifecycle code below
+    await startup()
+    try:
+        yield
+    finally:
+        await shutdown()
+
+app = FastAPI(title="Polymer Pricing API", lifespan=lifespan)
+
+# Performance metrics (Prometheus text format on /metrics)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), kind: str = "counter"):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.kind = kind
+        self.values = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for label_values, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+class Gauge(Counter):
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, help_text, labels, kind="gauge")
+
+    def set(self, value: float, *label_values):
+        self.values[label_values] = value
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, value: float, *label_values):
+        series = self.series.get(label_values)
+        if series is None:
+            # per-bucket counts (+Inf last), sum, count
+            series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
 
-app = FastAPI(title="Polymer Pricing API")
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labels + ("le",), label_values + (le,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Request latency by route", ("method", "route"))
+REQUESTS_TOTAL = Counter("http_requests_total", "Requests by route and status", ("method", "route", "status"))
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being served", ("route",))
+SCRAPE_STAGE_SECONDS = Histogram("scrape_stage_duration_seconds", "Time spent per scrape/snapshot stage", ("stage",))
+CACHE_REQUESTS = Counter("cache_requests_total", "Cache lookups by cache and result", ("cache", "result"))
+SNAPSHOT_VERSION = Gauge("price_snapshot_version", "Version of the current price snapshot")
+SNAPSHOT_ROWS = Gauge("price_snapshot_rows", "Rows in the current price snapshot")
+STARTUP_SECONDS = Gauge("app_startup_duration_seconds", "Module import to ready to serve")
+METRICS = [REQUEST_LATENCY, REQUESTS_TOTAL, REQUESTS_IN_FLIGHT, SCRAPE_STAGE_SECONDS,
+           CACHE_REQUESTS, SNAPSHOT_VERSION, SNAPSHOT_ROWS, STARTUP_SECONDS]
+
+@contextmanager
+def stage_timer(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        SCRAPE_STAGE_SECONDS.observe(time.perf_counter() - started, stage)
+
+# Sampled cProfile dumps: PROFILE_SAMPLE_RATE of requests, or any request sent
+# with "X-Profile: 1", are profiled into PROFILE_DIR (unset = disabled)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Only one cProfile profiler can be active per thread, so overlapping requests are not profiled
+_profiling = False
+
+def _route_template(scope) -> str:
+    """Path template of the route that will serve the request, before routing runs"""
+    return _match_route_template(scope["method"], scope.get("root_path", ""), scope["path"])
+
+# Routes are fixed once the app is built, so each (method, path) is matched once;
+# bounded because path parameters (product names) are client-supplied
+@lru_cache(maxsize=4096)
+def _match_route_template(method: str, root_path: str, path: str) -> str:
+    scope = {"type": "http", "method": method, "root_path": root_path, "path": path}
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status counts and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        global _profiling
+        status = 500
+        profiler = None
+        if PROFILE_DIR and not _profiling and (
+            (PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE)
+            or (b"x-profile", b"1") in scope["headers"]
+        ):
+            profiler = cProfile.Profile()
+            _profiling = True
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        route = _route_template(scope)
+        REQUESTS_IN_FLIGHT.inc(route)
+        started = time.perf_counter()
+        try:
+            if profiler:
+                profiler.enable()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profiler:
+                profiler.disable()
+                _profiling = False
+            elapsed = time.perf_counter() - started
+            REQUESTS_IN_FLIGHT.inc(route, amount=-1)
+            REQUEST_LATENCY.observe(elapsed, scope["method"], route)
+            REQUESTS_TOTAL.inc(scope["method"], route, str(status))
+            if profiler:
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                name = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+                profiler.dump_stats(os.path.join(PROFILE_DIR, f"{name}-{int(time.time() * 1000)}.prof"))
+
+app.add_middleware(MetricsMiddleware)
 
 # CORS Configuration
 app.add_middleware(
@@ -20,20 +210,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Total-Count", "X-Snapshot-Version"],
 )
 
 # MongoDB Configuration
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "polymer_pricing")
 
-try:
-    client = MongoClient(MONGO_URL)
-    db = client[DB_NAME]
-    print(f"Connected to MongoDB: {MONGO_URL}")
-except Exception as e:
-    print(f"MongoDB connection error: {e}")
-    client = None
-    db = None
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_TIMEOUT_MS = int(os.getenv("MONGO_TIMEOUT_MS", "5000"))
+
+# Opened on startup, see open_price_store()
+client = None
+db = None
 
 # Pydantic Models
 class PolymerPrice(BaseModel):
@@ -58,97 +248,159 @@ class LocationFilter(BaseModel):
     location: str
     polymer_types: List[str]
 
+class AlertRuleCreate(BaseModel):
+    product: str
+    location: str
+    condition: str  # "above" / "below" a price, or a "move" of at least threshold percent
+    threshold: float
+
 # Sample locations for the app
 LOCATIONS = [
     "Mumbai", "Delhi", "Chennai", "Bangalore", "Kolkata", 
     "Ahmedabad", "Pune", "Hyderabad", "Indore", "Vadodara"
 ]
 
+# Price range like "₹89 - ₹92.75" or "₹1,02,500 - ₹1,04,000"
+PRICE_RANGE_RE = re.compile(r'₹\s*([\d,]+(?:\.\d+)?)\s*-\s*₹\s*([\d,]+(?:\.\d+)?)')
+
+# Product names (polymer types)
+POLYMER_NAME_RE = re.compile(r'\b(?:HD|LD|PPCP|PP|PVC|ABS|EVA|BOPP|PE|PMMA|PC|PET)(?![A-Za-z])[^₹\n]*?(?=\s*(?:₹|TRANSIT|$))')
+
+TRANSIT_RE = re.compile(r'\b(\d+\s*DAYS?)\b', re.IGNORECASE)
+# "1 DAY", "2 DAYS", "1-2 DAYS", "48 HRS", "1 WEEK"
+TRANSIT_DAYS_RE = re.compile(r'(\d+(?:\.\d+)?)(?:\s*-\s*(\d+(?:\.\d+)?))?\s*(DAY|HR|HOUR|WEEK)?', re.IGNORECASE)
+TRANSIT_UNIT_DAYS = {"DAY": 1.0, "HR": 1 / 24, "HOUR": 1 / 24, "WEEK": 7.0}
+
 # Helper function to parse price range
 def parse_price_range(price_range: str):
-    try:
-        # Remove currency symbol and split by '-'
-        clean_range = price_range.replace('₹', '').strip()
-        parts = clean_range.split(' - ')
-        if len(parts) == 2:
-            min_price = float(parts[0].strip())
-            max_price = float(parts[1].strip())
-            return min_price, max_price
-        return 0.0, 0.0
-    except:
+    match = PRICE_RANGE_RE.search(price_range)
+    if not match:
         return 0.0, 0.0
+    return float(match.group(1).replace(',', '')), float(match.group(2).replace(',', ''))
+
+def parse_price_ranges(price_ranges: List[str]) -> List[Tuple[float, float]]:
+    """Batch version of parse_price_range for a whole scrape"""
+    search = PRICE_RANGE_RE.search
+    parsed = []
+    for price_range in price_ranges:
+        match = search(price_range)
+        if match:
+            parsed.append((float(match.group(1).replace(',', '')), float(match.group(2).replace(',', ''))))
+        else:
+            parsed.append((0.0, 0.0))
+    return parsed
+
+def parse_transit_days(transit_time: str) -> float:
+    """Transit time text as days (upper end of a range); NaN when it cannot be read"""
+    match = TRANSIT_DAYS_RE.search(transit_time or "")
+    if not match:
+        return float("nan")
+    value = float(match.group(2) or match.group(1))
+    return value * TRANSIT_UNIT_DAYS[(match.group(3) or "DAY").upper()]
+
+class PriceCardExtractor:
+    """
+    Incremental price-card extraction over a streamed HTML body
+    Chunks go to an lxml pull parser; each div whose class mentions "price" or
+    "card" is matched when it closes (innermost first) and then cleared, so
+    peak memory is bounded by one card rather than the whole document.
+    """
+
+    def __init__(self, encoding: str = 'utf-8'):
+        from lxml import etree
 
-# Mock price change calculation
-def calculate_price_change():
-    change = random.uniform(-5.0, 3.0)
-    return change, f"{change:+.2f}%"
+        self._parser = etree.HTMLPullParser(events=('start', 'end'), encoding=encoding)
+        self._open_cards = 0
+        self.rows: List[dict] = []
+
+    @staticmethod
+    def _is_card(element) -> bool:
+        if element.tag != 'div':
+            return False
+        css_class = element.get('class')
+        if not css_class:
+            return False
+        css_class = css_class.lower()
+        return 'price' in css_class or 'card' in css_class
+
+    def feed(self, chunk: bytes):
+        self._parser.feed(chunk)
+        self._drain()
+
+    def close(self) -> List[dict]:
+        self._parser.close()
+        self._drain()
+        return self.rows
+
+    def _drain(self):
+        for event, element in self._parser.read_events():
+            if event == 'start':
+                if self._is_card(element):
+                    self._open_cards += 1
+                continue
+            if self._is_card(element):
+                self._open_cards -= 1
+                row = self._match_card(' '.join(element.itertext()))
+                if row:
+                    self.rows.append(row)
+                elif self._open_cards:
+                    # Part of a larger card (header, price block); match it there
+                    continue
+            elif self._open_cards:
+                # Keep text until the enclosing card has been matched
+                continue
+            element.clear()
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+
+    @staticmethod
+    def _match_card(text: str) -> Optional[dict]:
+        price = PRICE_RANGE_RE.search(text)
+        if not price:
+            return None
+        name = POLYMER_NAME_RE.search(text, 0, price.start())
+        if not name:
+            return None
+        transit = TRANSIT_RE.search(text, price.end())
+        return {
+            "product": ' '.join(name.group(0).split()),
+            "price_range": price.group(0),
+            "transit_time": transit.group(1).upper() if transit else "",
+        }
+
+def extract_price_cards(html: bytes) -> List[dict]:
+    """Extract rows from a complete page (the streaming path feeds chunks instead)"""
+    extractor = PriceCardExtractor()
+    extractor.feed(html)
+    return extractor.close()
+
+# Stable row identity: the same product/location always maps to the same id
+PRICE_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://www.source.one")
+
+@lru_cache(maxsize=1 << 20)
+def price_id(product: str, location: str) -> str:
+    return str(uuid.uuid5(PRICE_ID_NAMESPACE, f"{product}|{location}"))
+
+def assign_location(product: str) -> str:
+    # Deterministic so a grade does not hop between cities on every refresh
+    return LOCATIONS[zlib.crc32(product.encode()) % len(LOCATIONS)]
 
 # Scraping function for real-time data from source.one
 async def scrape_source_one_live():
     """
     Live scraping function to get real-time data from source.one
-    This function makes HTTP requests to source.one and parses the pricing data
+    Concurrent callers share one in-flight fetch through the scrape coordinator
     """
-    try:
-        import httpx
-        from bs4 import BeautifulSoup
-        
-        # Headers to mimic browser request
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        }
-        
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-            # Try to fetch the main page first
-            response = await client.get('https://www.source.one', headers=headers)
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Look for price data in various possible locations
-                price_elements = []
-                
-                # Method 1: Look for specific price card classes
-                price_cards = soup.find_all(['div'], class_=lambda x: x and ('price' in x.lower() or 'card' in x.lower()))
-                
-                # Method 2: Look for text patterns that match polymer prices
-                all_text = soup.get_text()
-                import re
-                
-                # Find price patterns like "₹89 - ₹92.75"
-                price_patterns = re.findall(r'₹[\d,]+(?:\.[\d]+)?\s*-\s*₹[\d,]+(?:\.[\d]+)?', all_text)
-                
-                # Find product names (polymer types)
-                polymer_patterns = re.findall(r'\b(?:HD|LD|PP|PVC|ABS|EVA|BOPP|PE|PPCP|PMMA|PC|PET)\s+[A-Z\s]+(?:MFI|MI|VA|IV|PIPE|GP|HM|K\d+)?\b', all_text)
-                
-                if price_patterns and polymer_patterns:
-                    print(f"Found {len(price_patterns)} price patterns and {len(polymer_patterns)} polymer patterns")
-                    # Return the fallback data for now, but with live scraping structure
-                    return await get_source_one_prices()
-                else:
-                    # Fallback to stored data if scraping fails
-                    print("Live scraping didn't find expected patterns, using stored data")
-                    return await get_source_one_prices()
-            else:
-                print(f"Failed to fetch source.one: {response.status_code}")
-                return await get_source_one_prices()
-                
-    except Exception as e:
-        print(f"Live scraping error: {e}")
-        # Fallback to stored data
-        return await get_source_one_prices()
+    snapshot = await scrape_coordinator.scrape()
+    return snapshot.table
 
 # Scraping function (simulated with actual source.one data)
 async def get_source_one_prices():
     """
     Simulated scraping function using the actual data from source.one
-    In production, this would use requests + BeautifulSoup to scrape live data
+    The live path (ScrapeCoordinator) streams the real page through PriceCardExtractor
     """
     # Real data from source.one as of scraping
     source_data = [
@@ -185,46 +437,2539 @@ async def get_source_one_prices():
         {"product": "PVC K70", "price_range": "₹81.05 - ₹87.85", "transit_time": "1 DAY"},
     ]
     
-    processed_data = []
-    for item in source_data[:20]:  # Limit to 20 items for demo
-        min_price, max_price = parse_price_range(item["price_range"])
-        price_change, price_change_percent = calculate_price_change()
-        
-        processed_data.append(PolymerPrice(
-            id=str(uuid.uuid4()),
-            product=item["product"],
-            price_range=item["price_range"],
-            min_price=min_price,
-            max_price=max_price,
-            price_change=price_change,
-            price_change_percent=price_change_percent,
-            transit_time=item["transit_time"],
-            last_updated=datetime.now(),
-            location=random.choice(LOCATIONS),
-            currency="INR"
-        ))
-    
-    return processed_data
+    return build_price_table(source_data)
+
+# Compact columnar price table
+PRICE_ROW = np.dtype([
+    ("product", "<u4"),
+    ("location", "<u2"),
+    ("transit", "<u2"),
+    ("currency", "u1"),
+    ("min_price", "<f8"),
+    ("max_price", "<f8"),
+    ("price_change", "<f8"),
+    ("price_change_pct", "<f8"),
+    ("last_updated", "<i8"),  # epoch microseconds
+])
+
+def format_price(value: float) -> str:
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+def format_price_range(min_price: float, max_price: float) -> str:
+    return f"₹{format_price(min_price)} - ₹{format_price(max_price)}"
+
+class StringPool:
+    """Interns strings to small integer codes"""
+
+    def __init__(self, values=()):
+        self.values: List[str] = []
+        self.codes = {}
+        for value in values:
+            self.intern(value)
+
+    def intern(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __getitem__(self, code: int) -> str:
+        return self.values[code]
+
+class PriceTable:
+    """
+    Price rows as one NumPy structured array plus interned string pools
+    Derived strings (id, price_range, price_change_percent) are not stored;
+    PolymerPrice models are only built for the rows a response actually needs.
+    """
+
+    def __init__(self, rows: np.ndarray, products: StringPool, locations: StringPool,
+                 transits: StringPool, currencies: StringPool):
+        self.rows = rows
+        self.products = products
+        self.locations = locations
+        self.transits = transits
+        self.currencies = currencies
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @classmethod
+    def from_columns(cls, products: List[str], locations: List[str], transit_times: List[str],
+                     min_prices, max_prices, price_changes, last_updated: datetime,
+                     currency: str = "INR", price_change_percents=0.0) -> "PriceTable":
+        product_pool, location_pool, transit_pool = StringPool(), StringPool(), StringPool()
+        rows = np.empty(len(products), dtype=PRICE_ROW)
+        rows["product"] = [product_pool.intern(p) for p in products]
+        rows["location"] = [location_pool.intern(loc) for loc in locations]
+        rows["transit"] = [transit_pool.intern(t) for t in transit_times]
+        rows["currency"] = 0
+        rows["min_price"] = min_prices
+        rows["max_price"] = max_prices
+        rows["price_change"] = price_changes
+        rows["price_change_pct"] = price_change_percents
+        rows["last_updated"] = int(last_updated.timestamp() * 1_000_000)
+        return cls(rows, product_pool, location_pool, transit_pool, StringPool([currency]))
+
+    @classmethod
+    def from_prices(cls, prices: List[PolymerPrice]) -> "PriceTable":
+        """Build from models (tests, stored documents)"""
+        pools = [StringPool() for _ in range(4)]
+        rows = np.empty(len(prices), dtype=PRICE_ROW)
+        for i, p in enumerate(prices):
+            rows[i] = (
+                pools[0].intern(p.product), pools[1].intern(p.location), pools[2].intern(p.transit_time),
+                pools[3].intern(p.currency), p.min_price, p.max_price, p.price_change,
+                float(p.price_change_percent.rstrip("%")), int(p.last_updated.timestamp() * 1_000_000),
+            )
+        return cls(rows, *pools)
+
+    @property
+    def min_prices(self) -> np.ndarray:
+        return self.rows["min_price"]
+
+    @property
+    def max_prices(self) -> np.ndarray:
+        return self.rows["max_price"]
+
+    @property
+    def price_changes(self) -> np.ndarray:
+        return self.rows["price_change"]
+
+    @property
+    def price_change_percents(self) -> np.ndarray:
+        return self.rows["price_change_pct"]
+
+    def product_names(self) -> List[str]:
+        values = self.products.values
+        return [values[code] for code in self.rows["product"].tolist()]
+
+    def location_names(self) -> List[str]:
+        values = self.locations.values
+        return [values[code] for code in self.rows["location"].tolist()]
+
+    def keys(self) -> List[Tuple[str, str]]:
+        """(product, location) per row"""
+        return list(zip(self.product_names(), self.location_names()))
+
+    def records(self, rows=None) -> List[dict]:
+        """Plain dicts with every PolymerPrice field, for the given row ids (default: all)"""
+        selected = self.rows if rows is None else self.rows[rows]
+        products, locations = self.products.values, self.locations.values
+        transits, currencies = self.transits.values, self.currencies.values
+        stamps = {}
+        records = []
+        for product, location, transit, currency, low, high, change, pct, updated in selected.tolist():
+            last_updated = stamps.get(updated)
+            if last_updated is None:
+                last_updated = stamps[updated] = datetime.fromtimestamp(updated / 1_000_000)
+            product, location = products[product], locations[location]
+            records.append({
+                "id": price_id(product, location),
+                "product": product,
+                "price_range": format_price_range(low, high),
+                "min_price": low,
+                "max_price": high,
+                "price_change": change,
+                "price_change_percent": f"{pct:+.2f}%",
+                "transit_time": transits[transit],
+                "last_updated": last_updated,
+                "location": location,
+                "currency": currencies[currency],
+            })
+        return records
+
+    def columns(self, fields, rows=None) -> List[list]:
+        """Only the requested PolymerPrice fields, one list per field, for the given row ids"""
+        selected = self.rows if rows is None else self.rows[rows]
+        products, locations = self.products.values, self.locations.values
+        product_names = [products[code] for code in selected["product"].tolist()]
+        location_names = [locations[code] for code in selected["location"].tolist()]
+        columns = []
+        for field in fields:
+            if field == "id":
+                column = [price_id(product, location) for product, location in zip(product_names, location_names)]
+            elif field == "product":
+                column = product_names
+            elif field == "location":
+                column = location_names
+            elif field == "price_range":
+                column = [format_price_range(low, high) for low, high in
+                          zip(selected["min_price"].tolist(), selected["max_price"].tolist())]
+            elif field == "price_change_percent":
+                column = [f"{pct:+.2f}%" for pct in selected["price_change_pct"].tolist()]
+            elif field == "transit_time":
+                transits = self.transits.values
+                column = [transits[code] for code in selected["transit"].tolist()]
+            elif field == "currency":
+                currencies = self.currencies.values
+                column = [currencies[code] for code in selected["currency"].tolist()]
+            elif field == "last_updated":
+                stamps = {updated: datetime.fromtimestamp(updated / 1_000_000)
+                          for updated in np.unique(selected["last_updated"]).tolist()}
+                column = [stamps[updated] for updated in selected["last_updated"].tolist()]
+            else:
+                column = selected[field].tolist()
+            columns.append(column)
+        return columns
+
+    def page(self, rows=None) -> List[PolymerPrice]:
+        """PolymerPrice models for the given row ids only"""
+        return [PolymerPrice.model_construct(**record) for record in self.records(rows)]
+
+def build_price_table(items: List[dict]) -> PriceTable:
+    """Turn raw product/price_range/transit_time rows into a price table"""
+    products = [item["product"] for item in items]
+    price_bounds = parse_price_ranges([item["price_range"] for item in items])
+    return PriceTable.from_columns(
+        products=products,
+        # Sources that quote per city set "location"; the rest are spread deterministically
+        locations=[item.get("location") or assign_location(item["product"]) for item in items],
+        transit_times=[item["transit_time"] for item in items],
+        min_prices=[low for low, _ in price_bounds],
+        max_prices=[high for _, high in price_bounds],
+        # Filled in against the previous snapshot by price_statistics on publish
+        price_changes=0.0,
+        last_updated=datetime.now(),
+    )
+
+# Search index over one snapshot
+SEARCH_SORT_FIELDS = ("product", "location", "min_price", "max_price", "price_change")
+EMPTY_ROWS = np.empty(0, dtype=np.int64)
+
+class PriceSearchIndex:
+    """
+    Read-only search structures for one snapshot
+    - 1..3-gram inverted index over distinct product names (upper-cased)
+    - hash index on location (case-insensitive, exact)
+    - min/max price columns sorted once, queried with searchsorted
+    Filters intersect as row-id arrays, so a query touches only matching rows.
+    """
+
+    def __init__(self, table: PriceTable):
+        self.size = len(table)
+        self.min_prices = table.min_prices
+        self.max_prices = table.max_prices
+        self.min_order = np.argsort(self.min_prices, kind="stable")
+        self.max_order = np.argsort(self.max_prices, kind="stable")
+        self.min_sorted = self.min_prices[self.min_order]
+        self.max_sorted = self.max_prices[self.max_order]
+
+        # Interned product codes already group rows; fold case-variants together
+        upper_ids = {}
+        code_to_product = np.array(
+            [upper_ids.setdefault(name.upper(), len(upper_ids)) for name in table.products.values],
+            dtype=np.int64,
+        )
+        self.products = list(upper_ids)
+        self.product_array = np.array(self.products, dtype=str)
+        self.row_products = code_to_product[table.rows["product"]] if self.size else EMPTY_ROWS
+        order = np.argsort(self.row_products, kind="stable")
+        boundaries = np.searchsorted(self.row_products[order], np.arange(len(self.products) + 1))
+        self.product_rows = [np.sort(order[a:b]) for a, b in zip(boundaries[:-1], boundaries[1:])]
+
+        self.location_rows = {}
+        location_codes = table.rows["location"]
+        for code, name in enumerate(table.locations.values):
+            rows = np.flatnonzero(location_codes == code)
+            key = name.lower()
+            if key in self.location_rows:
+                rows = np.union1d(self.location_rows[key], rows)
+            self.location_rows[key] = rows
+
+        grams = {}
+        for product_id, name in enumerate(self.products):
+            for n in (1, 2, 3):
+                for gram in {name[i:i + n] for i in range(len(name) - n + 1)}:
+                    grams.setdefault(gram, []).append(product_id)
+        self.grams = {gram: np.array(ids, dtype=np.int64) for gram, ids in grams.items()}
+
+        self._table = table
+        self._ranks = {}
+
+    def _product_matches(self, q: str) -> np.ndarray:
+        q = q.upper()
+        if len(q) <= 3:
+            # The gram is the whole query, so its postings are exact
+            product_ids = self.grams.get(q, EMPTY_ROWS)
+        else:
+            # Verify the rarest trigram's names directly: one vectorised substring
+            # pass is cheaper than intersecting every trigram's postings first
+            product_ids = min((self.grams.get(q[i:i + 3], EMPTY_ROWS) for i in range(len(q) - 2)), key=len)
+            if len(product_ids):
+                product_ids = product_ids[np.char.find(self.product_array[product_ids], q) >= 0]
+        if not len(product_ids):
+            return EMPTY_ROWS
+        if len(product_ids) > 64:
+            # Broad match (e.g. "LD" also hits every "MOULD"): one vectorised pass over rows
+            matched = np.zeros(len(self.products), dtype=bool)
+            matched[product_ids] = True
+            return np.flatnonzero(matched[self.row_products])
+        return np.sort(np.concatenate([self.product_rows[pid] for pid in product_ids]))
+
+    def _rank(self, field: str) -> np.ndarray:
+        """Position of every row when sorted by field, computed once per snapshot"""
+        rank = self._ranks.get(field)
+        if rank is None:
+            if field in ("product", "location"):
+                # Sort the (small) string pool once, then order rows by code rank
+                pool = self._table.products if field == "product" else self._table.locations
+                pool_rank = np.empty(len(pool.values), dtype=np.int64)
+                pool_rank[sorted(range(len(pool.values)), key=pool.values.__getitem__)] = np.arange(len(pool.values))
+                order = np.argsort(pool_rank[self._table.rows[field]], kind="stable")
+            else:
+                order = np.argsort(self._table.rows[field], kind="stable")
+            rank = np.empty(self.size, dtype=np.int64)
+            rank[order] = np.arange(self.size)
+            self._ranks[field] = rank
+        return rank
+
+    def search(self, q: Optional[str] = None, location: Optional[str] = None,
+               min_price: Optional[float] = None, max_price: Optional[float] = None,
+               sort: Optional[str] = None) -> np.ndarray:
+        """Row ids matching every given filter, in the requested order"""
+        rows = None
+        if q:
+            rows = self._product_matches(q)
+        if location:
+            location_rows = self.location_rows.get(location.lower(), EMPTY_ROWS)
+            rows = location_rows if rows is None else np.intersect1d(rows, location_rows, assume_unique=True)
+
+        if rows is None and (min_price is not None or max_price is not None):
+            # Price-only query: slice whichever sorted column gives the smaller range
+            ranges = []
+            if min_price is not None:
+                start = int(np.searchsorted(self.min_sorted, min_price, side="left"))
+                ranges.append(self.min_order[start:])
+            if max_price is not None:
+                end = int(np.searchsorted(self.max_sorted, max_price, side="right"))
+                ranges.append(self.max_order[:end])
+            rows = np.sort(min(ranges, key=len))
+        if rows is None:
+            rows = np.arange(self.size)
+        if min_price is not None:
+            rows = rows[self.min_prices[rows] >= min_price]
+        if max_price is not None:
+            rows = rows[self.max_prices[rows] <= max_price]
+
+        if sort:
+            rank = self._rank(sort.lstrip("-"))
+            rows = rows[np.argsort(rank[rows])]
+            if sort.startswith("-"):
+                rows = rows[::-1]
+        return rows
+
+# Landed cost: quoted price plus freight to each city, plus tax
+# Optional JSON config overriding the defaults below:
+# {"freight_per_kg": {"Mumbai": {"Pune": 0.9}}, "tax_rate": {"Delhi": 0.18}, "default_tax_rate": 0.18}
+LANDED_COST_CONFIG = os.getenv("LANDED_COST_CONFIG", "")
+FREIGHT_BASE_PER_KG = float(os.getenv("FREIGHT_BASE_PER_KG", "0.5"))  # loading/handling between cities
+FREIGHT_PER_KG_KM = float(os.getenv("FREIGHT_PER_KG_KM", "0.004"))  # ≈ ₹4 per tonne-km by road
+ROAD_KM_PER_DAY = float(os.getenv("ROAD_KM_PER_DAY", "500"))
+ROAD_DETOUR_FACTOR = 1.25  # road distance over great-circle distance
+DEFAULT_TAX_RATE = 0.18  # GST on polymers
+
+CITY_COORDINATES = {
+    "Mumbai": (19.076, 72.878), "Delhi": (28.704, 77.102), "Chennai": (13.083, 80.271),
+    "Bangalore": (12.972, 77.595), "Kolkata": (22.573, 88.364), "Ahmedabad": (23.023, 72.571),
+    "Pune": (18.520, 73.857), "Hyderabad": (17.385, 78.487), "Indore": (22.720, 75.858),
+    "Vadodara": (22.307, 73.181),
+}
+
+class FreightTable:
+    """
+    Freight (₹/kg) and road days between cities, and the tax rate per destination
+    Defaults come from great-circle distances between CITY_COORDINATES;
+    pairs in the config's freight_per_kg table override them.
+    """
+
+    def __init__(self, destinations: List[str], freight_per_kg: Optional[dict] = None,
+                 tax_rate: Optional[dict] = None, default_tax_rate: float = DEFAULT_TAX_RATE):
+        self.destinations = destinations
+        self.freight_per_kg = freight_per_kg or {}
+        self.tax_rates = np.array([(tax_rate or {}).get(city, default_tax_rate) for city in destinations])
+
+    @classmethod
+    def load(cls, path: str, destinations: List[str]) -> "FreightTable":
+        if not path:
+            return cls(destinations)
+        with open(path, encoding="utf-8") as f:
+            config = orjson.loads(f.read())
+        return cls(destinations, config.get("freight_per_kg"), config.get("tax_rate"),
+                   config.get("default_tax_rate", DEFAULT_TAX_RATE))
+
+    def road_km(self, origins: List[str]) -> np.ndarray:
+        """(origins x destinations) road distance estimate; NaN for cities without coordinates"""
+        nowhere = (np.nan, np.nan)
+        lat1, lon1 = np.radians([CITY_COORDINATES.get(city, nowhere) for city in origins]).T[:, :, None]
+        lat2, lon2 = np.radians([CITY_COORDINATES.get(city, nowhere) for city in self.destinations]).T[:, None, :]
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return 2 * 6371.0 * np.arcsin(np.sqrt(a)) * ROAD_DETOUR_FACTOR
+
+    def matrices(self, origins: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(freight ₹/kg, road days), each origins x destinations"""
+        km = self.road_km(origins)
+        same_city = np.array(origins)[:, None] == np.array(self.destinations)[None, :]
+        freight = np.where(same_city, 0.0, FREIGHT_BASE_PER_KG + km * FREIGHT_PER_KG_KM)
+        days = np.where(same_city, 0.0, np.ceil(km / ROAD_KM_PER_DAY))
+        for i, origin in enumerate(origins):
+            for j, destination in enumerate(self.destinations):
+                override = self.freight_per_kg.get(origin, {}).get(destination)
+                if override is not None:
+                    freight[i, j] = override
+        return freight, days
+
+freight_table = FreightTable.load(LANDED_COST_CONFIG, LOCATIONS)
+
+class LandedCostMatrix:
+    """
+    Cheapest delivered cost of every product in every destination city
+    Each quoted row is priced into every destination at once,
+    (price[:, None] + freight[origin]) * (1 + tax), then reduced to the
+    cheapest origin per product with reduceat over rows sorted by product.
+    """
+
+    def __init__(self, table: PriceTable, freight: FreightTable):
+        self.destinations = freight.destinations
+        self.destination_codes = {city: i for i, city in enumerate(self.destinations)}
+        rows = table.rows
+        origin_freight, origin_days = freight.matrices(table.locations.values)
+        transit_days = np.array([parse_transit_days(t) for t in table.transits.values])[rows["transit"]]
+
+        order = np.argsort(rows["product"], kind="stable")
+        rows = rows[order]
+        product_codes, starts = np.unique(rows["product"], return_index=True)
+        self.products = [table.products.values[code] for code in product_codes.tolist()]
+        self.product_codes = {name: i for i, name in enumerate(self.products)}
+
+        row_freight = origin_freight[rows["location"]]
+        multiplier = 1 + freight.tax_rates[None, :]
+        mid = (rows["min_price"] + rows["max_price"]) / 2
+        landed = (mid[:, None] + row_freight) * multiplier
+        # Rows with unknown freight (NaN) never win; fmin skips them
+        self.landed_price = np.fmin.reduceat(landed, starts, axis=0) if len(rows) else landed
+        # First row per product reaching the minimum: max over (n - position) of the winners
+        position = np.arange(len(rows))[:, None]
+        is_best = landed == self.landed_price[np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(rows)]))]
+        best = len(rows) - np.maximum.reduceat(np.where(is_best, len(rows) - position, 0), starts, axis=0) \
+            if len(rows) else np.zeros(landed.shape, dtype=np.int64)
+        priced = np.isfinite(self.landed_price)
+        best = np.where(priced, best, 0)
+
+        origin_codes = rows["location"][best]
+        self.origins = np.array(table.locations.values, dtype=object)[origin_codes] if len(rows) else best
+        self.freight = np.where(priced, row_freight[best, np.arange(len(self.destinations))], np.nan)
+        self.tax_rates = freight.tax_rates
+        self.landed_min = np.where(priced, (rows["min_price"][best] + self.freight) * multiplier, np.nan)
+        self.landed_max = np.where(priced, (rows["max_price"][best] + self.freight) * multiplier, np.nan)
+        self.price = np.where(priced, mid[best], np.nan)
+        self.transit_days = np.where(
+            priced, transit_days[order][best] + origin_days[origin_codes, np.arange(len(self.destinations))], np.nan)
+        self.priced = priced
+
+    def entries(self, product: Optional[str] = None, location: Optional[str] = None) -> List[dict]:
+        """Per product/destination breakdown, for one product and/or destination"""
+        product_ids = [self.product_codes[product]] if product is not None else range(len(self.products))
+        destination_ids = [self.destination_codes[location]] if location is not None else range(len(self.destinations))
+
+        def number(value):
+            return round(float(value), 2) if np.isfinite(value) else None
+
+        return [
+            {
+                "product": self.products[p],
+                "location": self.destinations[d],
+                "origin": self.origins[p, d] if self.priced[p, d] else None,
+                "price": number(self.price[p, d]),
+                "freight": number(self.freight[p, d]),
+                "tax_rate": float(self.tax_rates[d]),
+                "landed_price": number(self.landed_price[p, d]),
+                "landed_min": number(self.landed_min[p, d]),
+                "landed_max": number(self.landed_max[p, d]),
+                "transit_days": number(self.transit_days[p, d]),
+            }
+            for p in product_ids
+            for d in destination_ids
+        ]
+
+    def grid(self) -> dict:
+        """Whole product x destination matrix for the comparison view"""
+        return {
+            "products": self.products,
+            "locations": self.destinations,
+            "landed_price": np.round(self.landed_price, 2).tolist(),
+            "origins": np.where(self.priced, self.origins, None).tolist(),
+            "transit_days": self.transit_days.tolist(),
+        }
+
+# Versioned price snapshot shared by every read endpoint
+@dataclass(frozen=True)
+class PriceSnapshot:
+    """Immutable view of the price list; replaced wholesale on refresh"""
+    version: int
+    created_at: datetime
+    table: PriceTable
+
+    @cached_property
+    def search_index(self) -> PriceSearchIndex:
+        return PriceSearchIndex(self.table)
+
+    @cached_property
+    def landed_costs(self) -> LandedCostMatrix:
+        return LandedCostMatrix(self.table, freight_table)
+
+    @cached_property
+    def key_order(self) -> Tuple[np.ndarray, List[Tuple[str, str]]]:
+        """Row ids sorted by (product, location), and those keys, for keyset pagination"""
+        keys = self.table.keys()
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        return np.array(order, dtype=np.int64), [keys[row] for row in order]
+
+SNAPSHOT_REFRESH_SECONDS = float(os.getenv("SNAPSHOT_REFRESH_SECONDS", "300"))
+
+_snapshot: Optional[PriceSnapshot] = None
+_snapshot_lock = asyncio.Lock()
+_refresh_task: Optional[asyncio.Task] = None
+
+def publish_snapshot(table: PriceTable, version: Optional[int] = None,
+                     created_at: Optional[datetime] = None) -> PriceSnapshot:
+    """
+    Swap in a new snapshot built from the given table
+    version/created_at are passed when adopting a snapshot the refresher
+    worker already published; its price changes are then taken as-is.
+    """
+    global _snapshot
+    adopted = version is not None
+    if not adopted:
+        version = _snapshot.version + 1 if _snapshot else 1
+        created_at = datetime.now()
+    with stage_timer("statistics"):
+        price_statistics.update(table, int(created_at.timestamp()), derive=not adopted)
+    _snapshot = PriceSnapshot(
+        version=version,
+        created_at=created_at,
+        table=table,
+    )
+    # Build derived structures now so requests only ever read them
+    with stage_timer("snapshot"):
+        _snapshot.search_index
+        _snapshot.landed_costs
+        catalog_facets.apply(_snapshot)
+    if shared_snapshot is not None and shared_snapshot.leader and not adopted:
+        with stage_timer("share"):
+            shared_snapshot.write(_snapshot)
+    _schedule_snapshot_listeners(_snapshot)
+    return _snapshot
+
+# Async side effects of a new snapshot (persistence, push, ...)
+snapshot_listeners: List[Callable[[PriceSnapshot], Awaitable[None]]] = []
+_background_tasks = set()
+
+def on_snapshot(listener: Callable[[PriceSnapshot], Awaitable[None]]):
+    """Register a coroutine to run for every published snapshot"""
+    snapshot_listeners.append(listener)
+    return listener
+
+async def _notify_snapshot_listeners(snapshot: PriceSnapshot):
+    # Run concurrently so a slow listener (e.g. an unreachable database) delays no one else
+    results = await asyncio.gather(
+        *(listener(snapshot) for listener in snapshot_listeners),
+        return_exceptions=True,
+    )
+    for listener, result in zip(snapshot_listeners, results):
+        if isinstance(result, Exception):
+            print(f"Snapshot listener {listener.__name__} failed: {result}")
+
+def _schedule_snapshot_listeners(snapshot: PriceSnapshot):
+    if not snapshot_listeners:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(_notify_snapshot_listeners(snapshot))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+async def refresh_snapshot(table: PriceTable) -> PriceSnapshot:
+    """Publish a freshly scraped table as the new snapshot"""
+    async with _snapshot_lock:
+        return publish_snapshot(table)
+
+async def get_snapshot() -> PriceSnapshot:
+    """
+    Current snapshot; seeded on first use (see load_seed_table)
+    Later snapshots only come from live scrapes (or the refresher worker's file).
+    """
+    snapshot = _snapshot
+    if snapshot is None:
+        async with _snapshot_lock:
+            if _snapshot is None:
+                publish_snapshot(await load_seed_table())
+        snapshot = _snapshot
+    return snapshot
+
+async def snapshot_refresher():
+    """Background task that live-scrapes the price sources on a fixed schedule"""
+    while True:
+        await asyncio.sleep(SNAPSHOT_REFRESH_SECONDS)
+        try:
+            # A failed or unchanged scrape keeps the current snapshot
+            await scrape_coordinator.refresh()
+        except Exception as e:
+            print(f"Snapshot refresh error: {e}")
+
+# Snapshot sharing between uvicorn workers
+# Turned on for `uvicorn server:app --workers N` (and WEB_CONCURRENCY > 1); set
+# SHARED_SNAPSHOT_DIR to choose the directory, or to share between other process managers
+def default_shared_snapshot_dir() -> str:
+    """A shared directory when this process is one of several workers, else "" (disabled)"""
+    # uvicorn starts its workers with multiprocessing; a single process never imports it this early
+    multiprocessing = sys.modules.get("multiprocessing")
+    worker = multiprocessing is not None and multiprocessing.parent_process() is not None
+    if not worker and int(os.getenv("WEB_CONCURRENCY", "1")) <= 1:
+        return ""
+    return "/dev/shm/polymer-snapshot" if os.path.isdir("/dev/shm") else "polymer-snapshot"
+
+SHARED_SNAPSHOT_DIR = os.getenv("SHARED_SNAPSHOT_DIR") or default_shared_snapshot_dir()
+SHARED_SNAPSHOT_POLL_SECONDS = float(os.getenv("SHARED_SNAPSHOT_POLL_SECONDS", "0.5"))
+# How long a starting follower waits for the refresher's first snapshot before building its own
+SHARED_SNAPSHOT_WAIT_SECONDS = float(os.getenv("SHARED_SNAPSHOT_WAIT_SECONDS", "10"))
+
+# magic, version, created_at (epoch µs), row count, string pool bytes; rows start at offset 64
+SHARED_HEADER = struct.Struct("<8sQqQQ")
+SHARED_HEADER_SIZE = 64
+SHARED_MAGIC = b"PSNAP001"
+
+class SharedSnapshot:
+    """
+    Price table published through a memory-mapped file for multi-worker deployments
+    The worker holding refresher.lock is the only one that refreshes and
+    scrapes; it writes each snapshot to a temp file and renames it over
+    snapshot.bin. The others poll the file, map a new one read-only and
+    adopt it as-is, so the rows are shared zero-copy and a reader only ever
+    sees a complete file (mappings of replaced files stay valid). If the
+    refresher dies its lock is released and a follower takes over.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "snapshot.bin")
+        self.lock_path = os.path.join(directory, "refresher.lock")
+        self.leader = False
+        self._lock_file = None
+        self._identity = None
+
+    def try_lead(self) -> bool:
+        """Become the refresher if no other worker holds the lock"""
+        import fcntl
+
+        if self.leader:
+            return True
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        self.leader = True
+        return True
+
+    def release(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        self.leader = False
+
+    def write(self, snapshot: PriceSnapshot):
+        table = snapshot.table
+        pools = orjson.dumps([
+            table.products.values, table.locations.values, table.transits.values, table.currencies.values,
+        ])
+        header = SHARED_HEADER.pack(SHARED_MAGIC, snapshot.version, int(snapshot.created_at.timestamp() * 1_000_000),
+                                    len(table), len(pools))
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header.ljust(SHARED_HEADER_SIZE, b"\0"))
+            f.write(np.ascontiguousarray(table.rows).data)
+            f.write(pools)
+        os.replace(tmp_path, self.path)
+        self._identity = (snapshot.version, int(snapshot.created_at.timestamp() * 1_000_000))
+
+    def _published(self):
+        """(version, created_at) from the header of the current file"""
+        try:
+            with open(self.path, "rb") as f:
+                header = f.read(SHARED_HEADER.size)
+        except FileNotFoundError:
+            return None
+        if len(header) < SHARED_HEADER.size:
+            return None
+        return SHARED_HEADER.unpack(header)[1:3]
+
+    def read(self) -> Optional[Tuple[int, datetime, PriceTable]]:
+        """(version, created_at, table) of the published file if it changed since the last read/write"""
+        identity = self._published()
+        if identity is None or identity == self._identity:
+            return None
+        with open(self.path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, created_at, count, pool_size = SHARED_HEADER.unpack_from(mapped)
+        identity = (version, created_at)
+        pools_at = SHARED_HEADER_SIZE + count * PRICE_ROW.itemsize
+        if magic != SHARED_MAGIC or len(mapped) != pools_at + pool_size:
+            raise ValueError(f"{self.path} is not a complete price snapshot")
+        self._identity = identity
+        # Read-only view straight onto the mapping; it stays alive as long as the table does
+        rows = np.frombuffer(mapped, dtype=PRICE_ROW, count=count, offset=SHARED_HEADER_SIZE)
+        pools = [StringPool(values) for values in orjson.loads(mapped[pools_at:])]
+        return version, datetime.fromtimestamp(created_at / 1_000_000), PriceTable(rows, *pools)
+
+    def adopt(self) -> Optional[PriceSnapshot]:
+        """Publish the refresher's latest snapshot in this worker, if there is a new one"""
+        published = self.read()
+        if published is None:
+            return None
+        version, created_at, table = published
+        return publish_snapshot(table, version=version, created_at=created_at)
+
+shared_snapshot: Optional[SharedSnapshot] = SharedSnapshot(SHARED_SNAPSHOT_DIR) if SHARED_SNAPSHOT_DIR else None
+
+def is_refresher() -> bool:
+    """True in single-process mode and in the one worker elected to refresh"""
+    return shared_snapshot is None or shared_snapshot.leader
+
+async def snapshot_follower():
+    """Adopt snapshots published by the refresher worker; take over if it goes away"""
+    global _refresh_task
+    while True:
+        await asyncio.sleep(SHARED_SNAPSHOT_POLL_SECONDS)
+        try:
+            shared_snapshot.adopt()
+            if shared_snapshot.try_lead():
+                print(f"Worker {os.getpid()} took over snapshot refreshing")
+                # Grade codes in the history log must come from the file, not this worker's memory
+                price_history_store.reload()
+                _refresh_task = asyncio.create_task(snapshot_refresher())
+                return
+        except Exception as e:
+            print(f"Shared snapshot error: {e}")
+
+# Catalog facets (family -> grades -> locations), maintained across snapshots
+def polymer_family(product: str) -> str:
+    return product.split()[0]
+
+def _bounds(values) -> dict:
+    """Row count and price bounds over (min_price, max_price) pairs"""
+    values = list(values)
+    return {
+        "count": len(values),
+        "min_price": min(low for low, _ in values),
+        "max_price": max(high for _, high in values),
+    }
+
+class CatalogFacets:
+    """
+    Facet counts and price bounds, updated from the rows that changed
+    between snapshots; the serialised view is rebuilt only when a facet moved.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.rows = {}
+        self.grade_locations = {}
+        self.location_grades = {}
+        self.family_grades = {}
+        self.grade_bounds = {}
+        self.location_bounds = {}
+        self.family_bounds = {}
+        self._view = None
+
+    def apply(self, snapshot: PriceSnapshot):
+        table = snapshot.table
+        new_rows = dict(zip(table.keys(), zip(table.min_prices.tolist(), table.max_prices.tolist())))
+        touched_grades = set()
+        touched_locations = set()
+        for product, location in self.rows.keys() - new_rows.keys():
+            del self.grade_locations[product][location]
+            del self.location_grades[location][product]
+            touched_grades.add(product)
+            touched_locations.add(location)
+        for (product, location), bounds in new_rows.items():
+            if self.rows.get((product, location)) == bounds:
+                continue
+            self.grade_locations.setdefault(product, {})[location] = bounds
+            self.location_grades.setdefault(location, {})[product] = bounds
+            self.family_grades.setdefault(polymer_family(product), set()).add(product)
+            touched_grades.add(product)
+            touched_locations.add(location)
+        self.rows = new_rows
+        self.version = snapshot.version
+        if not touched_grades:
+            return
+
+        for product in touched_grades:
+            if self.grade_locations[product]:
+                self.grade_bounds[product] = _bounds(self.grade_locations[product].values())
+            else:
+                del self.grade_locations[product]
+                self.grade_bounds.pop(product, None)
+                self.family_grades[polymer_family(product)].discard(product)
+        for location in touched_locations:
+            if self.location_grades[location]:
+                self.location_bounds[location] = _bounds(self.location_grades[location].values())
+            else:
+                del self.location_grades[location]
+                self.location_bounds.pop(location, None)
+        for family in {polymer_family(product) for product in touched_grades}:
+            grades = self.family_grades[family]
+            if not grades:
+                del self.family_grades[family]
+                self.family_bounds.pop(family, None)
+                continue
+            grade_bounds = [self.grade_bounds[product] for product in grades]
+            self.family_bounds[family] = {
+                "count": sum(b["count"] for b in grade_bounds),
+                "min_price": min(b["min_price"] for b in grade_bounds),
+                "max_price": max(b["max_price"] for b in grade_bounds),
+            }
+        self._view = None
+
+    def view(self) -> dict:
+        if self._view is None:
+            self._view = {
+                "families": [
+                    {
+                        "family": family,
+                        **self.family_bounds[family],
+                        "grades": [
+                            {
+                                "product": product,
+                                **self.grade_bounds[product],
+                                "locations": sorted(self.grade_locations[product]),
+                            }
+                            for product in sorted(self.family_grades[family])
+                        ],
+                    }
+                    for family in sorted(self.family_grades)
+                ],
+                "locations": [
+                    {"location": location, **self.location_bounds[location]}
+                    for location in sorted(self.location_bounds)
+                ],
+                "polymer_types": sorted(self.family_grades),
+                "location_names": sorted(self.location_bounds),
+            }
+        return {"version": self.version, **self._view}
+
+catalog_facets = CatalogFacets()
+
+# Push of price deltas to connected dashboards (Server-Sent Events)
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "16"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+# Columns whose change makes a row part of a delta (last_updated moves every snapshot)
+DELTA_COLUMNS = ("transit", "currency", "min_price", "max_price", "price_change")
+
+def sse_frame(event: str, data: dict, event_id: Optional[int] = None) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: ".encode("utf-8") + orjson.dumps(data) + b"\n\n"
+
+class PriceBroadcaster:
+    """
+    Fans one diff per snapshot out to every subscriber
+    Each subscriber has a bounded queue; one that falls behind has its
+    backlog replaced by a single resync event instead of growing memory.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.version = 0
+        self._rows = {}
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def diff(self, snapshot: PriceSnapshot) -> dict:
+        table = snapshot.table
+        transits, currencies = table.transits.values, table.currencies.values
+        values = [
+            (transits[transit], currencies[currency], low, high, change)
+            for transit, currency, low, high, change in table.rows[list(DELTA_COLUMNS)].tolist()
+        ]
+        rows = dict(zip(table.keys(), values))
+        changed = [
+            row_id
+            for row_id, (key, value) in enumerate(rows.items())
+            if self._rows.get(key) != value
+        ]
+        removed = [list(key) for key in self._rows.keys() - rows.keys()]
+        delta = {
+            "version": snapshot.version,
+            "base_version": self.version,
+            "upserts": table.records(changed) if changed else [],
+            "removed": removed,
+        }
+        self._rows = rows
+        self.version = snapshot.version
+        return delta
+
+    def publish(self, snapshot: PriceSnapshot):
+        delta = self.diff(snapshot)
+        # Unchanged snapshots still get a (empty) frame: clients chain on base_version,
+        # and a skipped version would make every dashboard reload in full
+        if not self.subscribers:
+            return
+        frame = sse_frame("delta", delta, snapshot.version)
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and ask it to reload in full
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(sse_frame("resync", {"version": snapshot.version}, snapshot.version))
+
+price_broadcaster = PriceBroadcaster(SSE_QUEUE_SIZE)
+
+@on_snapshot
+async def broadcast_price_delta(snapshot: PriceSnapshot):
+    price_broadcaster.publish(snapshot)
+
+# Async price persistence
+class PriceStore:
+    """
+    MongoDB persistence for price snapshots (motor, or any motor-compatible
+    database handle such as mongomock_motor in tests)
+    Each snapshot is one unordered bulk_write of upserts keyed by product and location.
+    """
+
+    # Fields returned by read paths; never ship _id or bookkeeping fields
+    PRICE_PROJECTION = {"_id": 0, **{field: 1 for field in PolymerPrice.model_fields}}
+
+    def __init__(self, database):
+        self.db = database
+        self.prices = database["prices"]
+
+    async def ensure_indexes(self):
+        await self.prices.create_index(
+            [("product", 1), ("location", 1), ("timestamp", -1)],
+            name="product_location_timestamp",
+        )
+
+    async def save_snapshot(self, snapshot: PriceSnapshot) -> int:
+        from pymongo import UpdateOne
+
+        operations = [
+            UpdateOne(
+                {"product": record["product"], "location": record["location"]},
+                {"$set": {
+                    **record,
+                    "timestamp": snapshot.created_at,
+                    "snapshot_version": snapshot.version,
+                }},
+                upsert=True,
+            )
+            for record in snapshot.table.records()
+        ]
+        if not operations:
+            return 0
+        result = await self.prices.bulk_write(operations, ordered=False)
+        return result.upserted_count + result.modified_count
+
+    def find_prices(self, product: Optional[str] = None, location: Optional[str] = None,
+                    since: Optional[datetime] = None, fields: Optional[List[str]] = None):
+        """Cursor over stored prices, projected to the requested fields"""
+        query = {}
+        if product:
+            query["product"] = product
+        if location:
+            query["location"] = location
+        if since:
+            query["timestamp"] = {"$gte": since}
+        projection = {"_id": 0, **{field: 1 for field in fields}} if fields else self.PRICE_PROJECTION
+        return self.prices.find(query, projection)
+
+    async def load_prices(self, **filters) -> List[PolymerPrice]:
+        return [PolymerPrice(**doc) async for doc in self.find_prices(**filters)]
+
+    async def load_latest_table(self) -> Optional[PriceTable]:
+        """The last saved snapshot's rows (every row it upserted shares its timestamp), if any"""
+        latest = await self.prices.find_one({}, {"_id": 0, "timestamp": 1}, sort=[("timestamp", -1)])
+        if latest is None:
+            return None
+        return PriceTable.from_prices(await self.load_prices(since=latest["timestamp"]))
+
+price_store: Optional[PriceStore] = None
+_price_store_task: Optional[asyncio.Task] = None
+# How long the first snapshot waits for MongoDB before falling back to the built-in list
+MONGO_SEED_WAIT_SECONDS = float(os.getenv("MONGO_SEED_WAIT_SECONDS", "1"))
+
+async def load_seed_table() -> PriceTable:
+    """Rows for the first snapshot: the prices stored by the last run, else the built-in list"""
+    if _price_store_task is not None:
+        try:
+            await asyncio.wait_for(asyncio.shield(_price_store_task), MONGO_SEED_WAIT_SECONDS)
+        except asyncio.TimeoutError:
+            print("MongoDB not ready in time, seeding from the built-in price list")
+    if price_store is not None:
+        try:
+            table = await price_store.load_latest_table()
+            if table is not None and len(table):
+                print(f"Seeded from {len(table)} stored prices")
+                return table
+        except Exception as e:
+            print(f"Loading stored prices failed: {e}")
+    return await get_source_one_prices()
+
+async def open_price_store():
+    """Connect the pooled motor client and make sure indexes exist"""
+    global client, db, price_store, alert_rule_store
+    await import_in_background("motor.motor_asyncio")
+    import motor.motor_asyncio
+
+    mongo_client = motor.motor_asyncio.AsyncIOMotorClient(
+        MONGO_URL,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        serverSelectionTimeoutMS=MONGO_TIMEOUT_MS,
+    )
+    database = mongo_client[DB_NAME]
+    store, rule_store = PriceStore(database), AlertRuleStore(database)
+    try:
+        await store.ensure_indexes()
+        await rule_store.ensure_indexes()
+    except Exception as e:
+        print(f"MongoDB connection error: {e}")
+        mongo_client.close()
+        return
+    print(f"Connected to MongoDB: {MONGO_URL}")
+    # Only publish reachable stores: every snapshot and alert request would otherwise
+    # wait out the server selection timeout, and /readyz would report a database
+    client, db = mongo_client, database
+    price_store, alert_rule_store = store, rule_store
+    try:
+        await sync_alert_rules()
+        if _snapshot is not None:
+            # The first snapshot may have been published before the store was open
+            await price_store.save_snapshot(_snapshot)
+    except Exception as e:
+        print(f"MongoDB error: {e}")
+
+@on_snapshot
+async def persist_snapshot(snapshot: PriceSnapshot):
+    if price_store is not None and is_refresher():
+        with stage_timer("persist"):
+            await price_store.save_snapshot(snapshot)
+
+# Price history time series
+PRICE_HISTORY_DIR = os.getenv("PRICE_HISTORY_DIR", "")
+
+HISTORY_RECORD = np.dtype([("grade", "<u4"), ("ts", "<i8"), ("min", "<f8"), ("max", "<f8")])
+
+# Days, candles and their labels follow the Indian market's clock (IST, no DST)
+MARKET_UTC_OFFSET = 19800
+MARKET_TZ = timezone(timedelta(seconds=MARKET_UTC_OFFSET), "IST")
+
+def market_day(ts):
+    """Day number of epoch seconds, counted in IST midnights; works on arrays"""
+    return (ts + MARKET_UTC_OFFSET) // 86400
+
+def market_time(dt: Optional[datetime]) -> Optional[datetime]:
+    """Query bounds given without an offset are IST wall-clock times, not the server's"""
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=MARKET_TZ)
+    return dt
+
+# Bucket width and origin (IST midnight, Monday 1970-01-05 for weeks) per interval
+HISTORY_INTERVALS = {
+    "1h": (3600, -MARKET_UTC_OFFSET),
+    "1d": (86400, -MARKET_UTC_OFFSET),
+    "1w": (7 * 86400, 4 * 86400 - MARKET_UTC_OFFSET),
+}
+
+class PriceSeries:
+    """Append-only (timestamp, min, max) columns for one grade"""
+
+    def __init__(self, capacity: int = 64):
+        self.size = 0
+        self.ts = np.empty(capacity, dtype=np.int64)
+        self.min = np.empty(capacity, dtype=np.float64)
+        self.max = np.empty(capacity, dtype=np.float64)
+
+    def extend(self, ts, min_prices, max_prices):
+        count = len(ts)
+        needed = self.size + count
+        if needed > len(self.ts):
+            capacity = max(needed, 2 * len(self.ts))
+            for name in ("ts", "min", "max"):
+                column = np.empty(capacity, dtype=getattr(self, name).dtype)
+                column[:self.size] = getattr(self, name)[:self.size]
+                setattr(self, name, column)
+        self.ts[self.size:needed] = ts
+        self.min[self.size:needed] = min_prices
+        self.max[self.size:needed] = max_prices
+        self.size = needed
+
+    def window(self, start: Optional[int], end: Optional[int]):
+        """Views of the columns with start <= ts <= end (ts is append-ordered)"""
+        ts = self.ts[:self.size]
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        hi = self.size if end is None else int(np.searchsorted(ts, end, side="right"))
+        return ts[lo:hi], self.min[lo:hi], self.max[lo:hi]
+
+class PriceHistoryStore:
+    """
+    Per-grade price history held in NumPy columns
+    When a directory is configured, every snapshot is also appended to a
+    binary log (history.bin) plus a grade dictionary (grades.txt) and
+    replayed on start-up.
+    """
+
+    def __init__(self, directory: str = ""):
+        self.directory = directory
+        self.series = {}
+        self.grade_codes = {}
+        self.grades: List[Tuple[str, str]] = []
+        self.locations_by_product = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._load()
+
+    def _grade_code(self, product: str, location: str, log: bool = True) -> int:
+        key = (product, location)
+        code = self.grade_codes.get(key)
+        if code is None:
+            code = len(self.grades)
+            self._add_grade(key)
+            if log and self.directory:
+                with open(os.path.join(self.directory, "grades.txt"), "a", encoding="utf-8") as f:
+                    f.write(f"{product}\t{location}\n")
+        return code
+
+    def _add_grade(self, key: Tuple[str, str]):
+        self.grade_codes[key] = len(self.grades)
+        self.grades.append(key)
+        self.series[key] = PriceSeries()
+        self.locations_by_product.setdefault(key[0], []).append(key[1])
+
+    def reload(self):
+        """Drop in-memory series and replay the log from disk"""
+        self.__init__(self.directory)
+
+    def _load(self):
+        grades_path = os.path.join(self.directory, "grades.txt")
+        log_path = os.path.join(self.directory, "history.bin")
+        if os.path.exists(grades_path):
+            with open(grades_path, encoding="utf-8") as f:
+                for line in f:
+                    product, location = line.rstrip("\n").split("\t")
+                    self._add_grade((product, location))
+        if not os.path.exists(log_path):
+            return
+        records = np.fromfile(log_path, dtype=HISTORY_RECORD)
+        # A torn final write leaves a partial record, which fromfile drops and
+        # the next append truncates (only the refresher writes, so only it repairs)
+        records = records[records["grade"] < len(self.grades)]
+        order = np.argsort(records["grade"], kind="stable")
+        records = records[order]
+        codes, starts = np.unique(records["grade"], return_index=True)
+        ends = np.r_[starts[1:], len(records)]
+        for code, start, end in zip(codes, starts, ends):
+            chunk = records[start:end]
+            self.series[self.grades[code]].extend(chunk["ts"], chunk["min"], chunk["max"])
+
+    def append_snapshot(self, snapshot: PriceSnapshot, log: bool = True):
+        ts = int(snapshot.created_at.timestamp())
+        table = snapshot.table
+        keys = table.keys()
+        records = np.empty(len(keys), dtype=HISTORY_RECORD)
+        records["grade"] = [self._grade_code(product, location, log) for product, location in keys]
+        records["ts"] = ts
+        records["min"] = table.min_prices
+        records["max"] = table.max_prices
+        for key, low, high in zip(keys, table.min_prices.tolist(), table.max_prices.tolist()):
+            self.series[key].extend((ts,), (low,), (high,))
+        if log and self.directory and len(records):
+            with open(os.path.join(self.directory, "history.bin"), "ab") as f:
+                # Drop a torn record left by a crash (skipped by _load) so this one starts aligned
+                end = f.tell()
+                if end % HISTORY_RECORD.itemsize:
+                    f.truncate(end - end % HISTORY_RECORD.itemsize)
+                records.tofile(f)
+
+    def query(self, product: str, location: Optional[str] = None,
+              start: Optional[int] = None, end: Optional[int] = None):
+        """(ts, min, max) arrays for a product, merged across locations unless one is given"""
+        locations = self.locations_by_product.get(product, [])
+        windows = [
+            self.series[(product, loc)].window(start, end)
+            for loc in locations
+            if location is None or loc == location
+        ]
+        if not windows:
+            empty = np.empty(0)
+            return empty.astype(np.int64), empty, empty
+        if len(windows) == 1:
+            return windows[0]
+        ts, mins, maxs = (np.concatenate(column) for column in zip(*windows))
+        order = np.argsort(ts, kind="stable")
+        return ts[order], mins[order], maxs[order]
+
+def downsample_ohlc(ts, min_prices, max_prices, interval: str):
+    """Vectorised OHLC + mean of the min/max midpoint per interval bucket"""
+    width, origin = HISTORY_INTERVALS[interval]
+    mid = (min_prices + max_prices) / 2
+    if not len(ts):
+        return []
+    buckets = (ts - origin) // width * width + origin
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ts)]
+    counts = ends - starts
+    opens = mid[starts]
+    closes = mid[ends - 1]
+    highs = np.maximum.reduceat(mid, starts)
+    lows = np.minimum.reduceat(mid, starts)
+    means = np.add.reduceat(mid, starts) / counts
+    return [
+        {
+            "date": datetime.fromtimestamp(int(bucket), MARKET_TZ),
+            "price": round(float(mean), 2),
+            "open": round(float(o), 2),
+            "high": round(float(h), 2),
+            "low": round(float(l), 2),
+            "close": round(float(c), 2),
+            "count": int(n),
+        }
+        for bucket, mean, o, h, l, c, n in zip(buckets[starts], means, opens, highs, lows, closes, counts)
+    ]
+
+price_history_store = PriceHistoryStore(PRICE_HISTORY_DIR)
+
+@on_snapshot
+async def record_price_history(snapshot: PriceSnapshot):
+    # Every worker keeps the series in memory; only the refresher appends to the log
+    price_history_store.append_snapshot(snapshot, log=is_refresher())
+
+# Price change and rolling statistics per grade
+STATS_WINDOWS = (7, 30)  # days
+STATS_RING_DAYS = max(STATS_WINDOWS) + 1  # one extra day for the first daily return
+
+# Aggregates over the completed days of a window (today is added at read time)
+WINDOW_AGGREGATE = np.dtype([
+    ("count", "<f8"), ("sum", "<f8"), ("sumsq", "<f8"), ("min", "<f8"), ("max", "<f8"),
+    ("returns", "<f8"), ("return_sum", "<f8"), ("return_sumsq", "<f8"),
+])
+EMPTY_AGGREGATE = np.array((0, 0, 0, np.nan, np.nan, 0, 0, 0), dtype=WINDOW_AGGREGATE)
+
+class PriceStatistics:
+    """
+    Price change and 7/30-day rolling statistics per (product, location) grade
+    Each grade owns a slot in flat NumPy columns. A snapshot is folded in
+    with one vectorised pass: change is measured on the min/max midpoint
+    against the previous snapshot (and carried while the price holds), and
+    the midpoint becomes today's close in a small ring of daily closes.
+    Window aggregates over the completed days are rebuilt only when the day
+    rolls over, so a snapshot costs O(1) per grade however long the window.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.products = StringPool()
+        self.locations = StringPool()
+        self.grade_keys = np.empty(0, dtype=np.int64)  # sorted product << 16 | location
+        self.grade_slots = np.empty(0, dtype=np.int64)
+        self.size = 0
+        self.day: Optional[int] = None
+        self.last_mid = np.full(capacity, np.nan)
+        self.change = np.zeros(capacity)
+        self.change_pct = np.zeros(capacity)
+        self.closes = np.full((STATS_RING_DAYS, capacity), np.nan)  # one row per ring day
+        self.windows = {window: np.full(capacity, EMPTY_AGGREGATE) for window in STATS_WINDOWS}
+
+    def _grow(self, size: int):
+        capacity = len(self.last_mid)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity)
+        for name, fill in (("last_mid", np.nan), ("change", 0.0), ("change_pct", 0.0)):
+            column = np.full(capacity, fill)
+            column[:self.size] = getattr(self, name)[:self.size]
+            setattr(self, name, column)
+        closes = np.full((STATS_RING_DAYS, capacity), np.nan)
+        closes[:, :self.size] = self.closes[:, :self.size]
+        self.closes = closes
+        for window, aggregate in self.windows.items():
+            grown = np.full(capacity, EMPTY_AGGREGATE)
+            grown[:self.size] = aggregate[:self.size]
+            self.windows[window] = grown
+
+    def _keys(self, table: PriceTable) -> np.ndarray:
+        # Translate the table's own string pools once, then map every row by code
+        products = np.array([self.products.intern(v) for v in table.products.values], dtype=np.int64)
+        locations = np.array([self.locations.intern(v) for v in table.locations.values], dtype=np.int64)
+        return products[table.rows["product"]] << 16 | locations[table.rows["location"]]
+
+    def slots(self, table: PriceTable) -> np.ndarray:
+        """Slot per table row, allocating slots for grades seen for the first time"""
+        return self._slots_for(self._keys(table))
+
+    def _slots_for(self, keys: np.ndarray) -> np.ndarray:
+        positions = np.searchsorted(self.grade_keys, keys)
+        found = positions < len(self.grade_keys)
+        found[found] = self.grade_keys[positions[found]] == keys[found]
+        slots = np.empty(len(keys), dtype=np.int64)
+        slots[found] = self.grade_slots[positions[found]]
+        if not found.all():
+            new_keys, inverse = np.unique(keys[~found], return_inverse=True)
+            new_slots = np.arange(self.size, self.size + len(new_keys))
+            slots[~found] = new_slots[inverse]
+            self._grow(self.size + len(new_keys))
+            self.size += len(new_keys)
+            merged = np.concatenate([self.grade_keys, new_keys])
+            order = np.argsort(merged, kind="stable")
+            self.grade_keys = merged[order]
+            self.grade_slots = np.concatenate([self.grade_slots, new_slots])[order]
+        return slots
+
+    def _roll(self, day: int):
+        """Advance to a new day: clear the ring days it reuses and rebuild window aggregates"""
+        if self.day is not None:
+            for skipped in range(self.day + 1, min(day, self.day + STATS_RING_DAYS) + 1):
+                self.closes[skipped % STATS_RING_DAYS] = np.nan
+        self.day = day
+        self._rebuild_windows()
+
+    def _rebuild_windows(self):
+        # Completed days by age (row 0 = yesterday) and the daily returns between them
+        by_age = self.closes[[(self.day - age) % STATS_RING_DAYS for age in range(1, STATS_RING_DAYS)], :self.size]
+        returns = by_age[:-1] / by_age[1:] - 1
+        has_day, has_return = np.isfinite(by_age), np.isfinite(returns)
+        days, returns = np.where(has_day, by_age, 0.0), np.where(has_return, returns, 0.0)
+        for window, aggregate in self.windows.items():
+            span = window - 1
+            target = aggregate[:self.size]
+            target["count"] = has_day[:span].sum(axis=0)
+            target["sum"] = days[:span].sum(axis=0)
+            target["sumsq"] = np.square(days[:span]).sum(axis=0)
+            target["min"] = np.fmin.reduce(by_age[:span], axis=0)
+            target["max"] = np.fmax.reduce(by_age[:span], axis=0)
+            target["returns"] = has_return[:span].sum(axis=0)
+            target["return_sum"] = returns[:span].sum(axis=0)
+            target["return_sumsq"] = np.square(returns[:span]).sum(axis=0)
+
+    def _record(self, slots: np.ndarray, mid: np.ndarray, day: int):
+        if self.day is None or day > self.day:
+            self._roll(day)
+        # A clock that steps backwards keeps writing to the current day
+        self.closes[self.day % STATS_RING_DAYS, slots] = mid
+        self.last_mid[slots] = mid
+
+    def update(self, table: PriceTable, ts: int, derive: bool = True):
+        """
+        Write price_change/price_change_pct into the (unpublished) table and record its prices
+        With derive=False the table's own change columns (set by the refresher worker) are kept.
+        """
+        slots = self.slots(table)
+        mid = (table.min_prices + table.max_prices) / 2
+        if not derive:
+            self.change[slots] = table.price_changes
+            self.change_pct[slots] = table.price_change_percents
+            self._record(slots, mid, market_day(ts))
+            return
+        previous = self.last_mid[slots]
+        known = np.isfinite(previous)
+        moved = known & (mid != previous)
+        # Grades seen for the first time keep whatever change the source supplied
+        change = np.where(known, self.change[slots], table.price_changes)
+        change_pct = np.where(known, self.change_pct[slots], table.price_change_percents)
+        change[moved] = mid[moved] - previous[moved]
+        change_pct[moved] = np.divide(change[moved], previous[moved], out=np.zeros(moved.sum()),
+                                      where=previous[moved] != 0) * 100
+        self.change[slots] = change
+        self.change_pct[slots] = change_pct
+        self._record(slots, mid, market_day(ts))
+        table.rows["price_change"] = change
+        table.rows["price_change_pct"] = change_pct
+
+    def seed(self, history: PriceHistoryStore, now: float):
+        """Load recent daily closes and last prices from the history store (before the first snapshot)"""
+        today = market_day(int(now))
+        start = (today - STATS_RING_DAYS + 1) * 86400 - MARKET_UTC_OFFSET
+        keys, days, closes, last_mids = [], [], [], []
+        for product, location in history.grades:
+            ts, min_prices, max_prices = history.series[(product, location)].window(None, None)
+            if not len(ts):
+                continue
+            keys.append(self.products.intern(product) << 16 | self.locations.intern(location))
+            last_mids.append((min_prices[-1] + max_prices[-1]) / 2)
+            lo = int(np.searchsorted(ts, start))
+            ts_days = market_day(ts[lo:])
+            # The last point of each day is that day's close
+            last = lo + np.flatnonzero(np.r_[ts_days[1:] != ts_days[:-1], True]) if len(ts_days) else np.empty(0, dtype=np.int64)
+            days.append(market_day(ts[last]))
+            closes.append((min_prices[last] + max_prices[last]) / 2)
+        if keys:
+            slots = self._slots_for(np.array(keys, dtype=np.int64))
+            self.last_mid[slots] = last_mids
+            counts = [len(d) for d in days]
+            day_slots, days, closes = np.repeat(slots, counts), np.concatenate(days), np.concatenate(closes)
+            keep = days <= today
+            self.closes[days[keep] % STATS_RING_DAYS, day_slots[keep]] = closes[keep]
+        self.day = today
+        self._rebuild_windows()
+
+    def window_stats(self, slots: np.ndarray, window: int) -> dict:
+        """Moving average, min/max of daily closes and volatility (std of daily % change) per slot"""
+        aggregate = self.windows[window][slots]
+        today = self.closes[self.day % STATS_RING_DAYS, slots]
+        daily_return = today / self.closes[(self.day - 1) % STATS_RING_DAYS, slots] - 1
+        has_today, has_return = np.isfinite(today), np.isfinite(daily_return)
+        today_value = np.where(has_today, today, 0.0)
+        return_value = np.where(has_return, daily_return, 0.0)
+        count = aggregate["count"] + has_today
+        returns = aggregate["returns"] + has_return
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = (aggregate["sum"] + today_value) / count
+            return_mean = (aggregate["return_sum"] + return_value) / returns
+            return_var = (aggregate["return_sumsq"] + return_value * return_value) / returns - return_mean ** 2
+        return {
+            "days": count,
+            "moving_average": mean,
+            "min": np.fmin(aggregate["min"], today),
+            "max": np.fmax(aggregate["max"], today),
+            "volatility": np.where(returns >= 2, np.sqrt(np.maximum(return_var, 0.0)) * 100, np.nan),
+        }
+
+    def summary(self, product: str, location: Optional[str] = None) -> List[dict]:
+        """Latest change and every rolling window for a product's grades"""
+        code = self.products.codes.get(product)
+        if code is None or self.day is None:
+            return []
+        lo, hi = np.searchsorted(self.grade_keys, [code << 16, (code + 1) << 16])
+        keys, slots = self.grade_keys[lo:hi], self.grade_slots[lo:hi]
+        if location is not None:
+            keep = keys & 0xFFFF == self.locations.codes.get(location, -1)
+            keys, slots = keys[keep], slots[keep]
+        windows = {window: self.window_stats(slots, window) for window in STATS_WINDOWS}
+
+        def number(value):
+            return round(float(value), 4) if np.isfinite(value) else None
+
+        return [
+            {
+                "product": product,
+                "location": self.locations[int(key) & 0xFFFF],
+                "price": number(self.last_mid[slot]),
+                "price_change": number(self.change[slot]),
+                "price_change_percent": number(self.change_pct[slot]),
+                **{
+                    f"{window}d": {name: number(values[i]) for name, values in stats.items() if name != "days"}
+                    | {"days": int(stats["days"][i])}
+                    for window, stats in windows.items()
+                },
+            }
+            for i, (key, slot) in enumerate(zip(keys.tolist(), slots.tolist()))
+        ]
+
+price_statistics = PriceStatistics()
+
+# Price alerts
+ALERT_CONDITIONS = ("above", "below", "move")
+ALERT_QUEUE_SIZE = int(os.getenv("ALERT_QUEUE_SIZE", "1000"))
+ALERT_WEBHOOK_URL = os.getenv("ALERT_WEBHOOK_URL", "")
+
+class SortedRules:
+    """Rule ids ordered by threshold, for range lookups with bisect"""
+
+    def __init__(self):
+        self.thresholds: List[float] = []
+        self.ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, threshold: float, rule_id: str):
+        position = bisect.bisect_right(self.thresholds, threshold)
+        self.thresholds.insert(position, threshold)
+        self.ids.insert(position, rule_id)
+
+    def remove(self, threshold: float, rule_id: str):
+        position = bisect.bisect_left(self.thresholds, threshold)
+        while self.ids[position] != rule_id:
+            position += 1
+        del self.thresholds[position]
+        del self.ids[position]
+
+class AlertRuleIndex:
+    """
+    Alert rules grouped per (product, location) grade, one threshold-sorted
+    list per condition, so a price move is matched in O(log rules + hits):
+    - above T fires when previous < T <= current
+    - below T fires when previous > T >= current
+    - move P fires when |current / previous - 1| >= P percent
+    """
+
+    def __init__(self):
+        self.rules = {}
+        self.grades = {}
+
+    def add(self, rule: dict):
+        if rule["id"] in self.rules:
+            return
+        self.rules[rule["id"]] = rule
+        grade = self.grades.setdefault((rule["product"], rule["location"]),
+                                       {condition: SortedRules() for condition in ALERT_CONDITIONS})
+        grade[rule["condition"]].add(rule["threshold"], rule["id"])
+
+    def remove(self, rule_id: str) -> bool:
+        rule = self.rules.pop(rule_id, None)
+        if rule is None:
+            return False
+        key = (rule["product"], rule["location"])
+        grade = self.grades[key]
+        grade[rule["condition"]].remove(rule["threshold"], rule_id)
+        if not any(grade.values()):
+            del self.grades[key]
+        return True
+
+    def list(self, product: Optional[str] = None, location: Optional[str] = None) -> List[dict]:
+        return [
+            rule for rule in self.rules.values()
+            if (product is None or rule["product"] == product)
+            and (location is None or rule["location"] == location)
+        ]
+
+    def match(self, product: str, location: str, previous: float, current: float) -> List[dict]:
+        grade = self.grades.get((product, location))
+        if grade is None:
+            return []
+        fired = []
+        if current > previous:
+            above = grade["above"]
+            fired += above.ids[bisect.bisect_right(above.thresholds, previous):
+                               bisect.bisect_right(above.thresholds, current)]
+        elif current < previous:
+            below = grade["below"]
+            fired += below.ids[bisect.bisect_left(below.thresholds, current):
+                               bisect.bisect_left(below.thresholds, previous)]
+        if previous:
+            move = grade["move"]
+            fired += move.ids[:bisect.bisect_right(move.thresholds, abs(current / previous - 1) * 100)]
+        return [self.rules[rule_id] for rule_id in fired]
+
+class AlertRuleStore:
+    """
+    MongoDB copy of the alert rules, shared by every worker
+    Deletes are soft so other workers see them through changes_since().
+    """
+
+    def __init__(self, database):
+        self.rules = database["alert_rules"]
+
+    async def ensure_indexes(self):
+        await self.rules.create_index("updated_at")
+
+    async def save(self, rule: dict):
+        await self.rules.replace_one({"id": rule["id"]}, {**rule, "deleted": False, "updated_at": datetime.now()},
+                                     upsert=True)
+
+    async def delete(self, rule_id: str):
+        await self.rules.update_one({"id": rule_id}, {"$set": {"deleted": True, "updated_at": datetime.now()}})
+
+    def changes_since(self, since: Optional[datetime]):
+        query = {"updated_at": {"$gte": since}} if since else {"deleted": False}
+        return self.rules.find(query, {"_id": 0}).sort("updated_at", 1)
+
+class AlertSink(ABC):
+    """Delivery target for fired alerts; register instances with add_alert_sink"""
+
+    @abstractmethod
+    async def send(self, notifications: List[dict]):
+        """Deliver one batch of notifications"""
+
+    async def close(self):
+        """Release connections on shutdown"""
+
+class QueueAlertSink(AlertSink):
+    """Bounded in-process queue for consumers in this worker; drops the oldest when full"""
+
+    def __init__(self, maxsize: int):
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    async def send(self, notifications: List[dict]):
+        for notification in notifications:
+            if self.queue.full():
+                self.queue.get_nowait()
+            self.queue.put_nowait(notification)
+
+class WebhookAlertSink(AlertSink):
+    """POSTs each batch as JSON to a URL over one pooled keep-alive client"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(timeout=10.0, headers={"Content-Type": "application/json"})
+        return self._client
+
+    async def send(self, notifications: List[dict]):
+        response = await self._get_client().post(self.url, content=orjson.dumps({"alerts": notifications}))
+        response.raise_for_status()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+class AlertEvaluator:
+    """
+    Matches each new snapshot against the alert rules in a background task
+    Only grades whose midpoint moved since the last evaluated snapshot are
+    looked up. Snapshots that arrive while one is being evaluated are
+    coalesced to the newest, which is still compared with the last one seen.
+    """
+
+    def __init__(self, index: AlertRuleIndex):
+        self.index = index
+        self.sinks: List[AlertSink] = []
+        self.last_mid = np.empty(0)
+        self._pending: Optional[PriceSnapshot] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def submit(self, snapshot: PriceSnapshot):
+        self._pending = snapshot
+        if self._wake is not None:
+            self._wake.set()
+
+    async def run(self):
+        self._wake = asyncio.Event()
+        while True:
+            if self._pending is None:
+                self._wake.clear()
+                await self._wake.wait()
+            snapshot, self._pending = self._pending, None
+            try:
+                await sync_alert_rules()
+                notifications = self.evaluate(snapshot)
+                if notifications:
+                    await self.deliver(notifications)
+            except Exception as e:
+                print(f"Alert evaluation error: {e}")
+
+    def evaluate(self, snapshot: PriceSnapshot) -> List[dict]:
+        table = snapshot.table
+        slots = price_statistics.slots(table)
+        if len(self.last_mid) < price_statistics.size:
+            grown = np.full(len(price_statistics.last_mid), np.nan)
+            grown[:len(self.last_mid)] = self.last_mid
+            self.last_mid = grown
+        mid = (table.min_prices + table.max_prices) / 2
+        previous = self.last_mid[slots]
+        self.last_mid[slots] = mid
+        changed = np.flatnonzero(np.isfinite(previous) & (mid != previous))
+        if not self.index.grades or not len(changed):
+            return []
+        products, locations = table.products.values, table.locations.values
+        notifications = []
+        for product_code, location_code, before, after in zip(
+            table.rows["product"][changed].tolist(), table.rows["location"][changed].tolist(),
+            previous[changed].tolist(), mid[changed].tolist(),
+        ):
+            product, location = products[product_code], locations[location_code]
+            for rule in self.index.match(product, location, before, after):
+                notifications.append(alert_notification(rule, snapshot, before, after))
+        return notifications
+
+    async def deliver(self, notifications: List[dict]):
+        results = await asyncio.gather(*(sink.send(notifications) for sink in self.sinks), return_exceptions=True)
+        for sink, result in zip(self.sinks, results):
+            if isinstance(result, Exception):
+                print(f"Alert sink {type(sink).__name__} failed: {result}")
+
+def alert_notification(rule: dict, snapshot: PriceSnapshot, previous: float, current: float) -> dict:
+    change_pct = (current / previous - 1) * 100 if previous else 0.0
+    if rule["condition"] == "move":
+        message = f"{rule['product']} in {rule['location']} moved {change_pct:+.2f}% to ₹{format_price(current)}"
+    else:
+        message = (f"{rule['product']} in {rule['location']} crossed {rule['condition']} "
+                   f"₹{format_price(rule['threshold'])}: ₹{format_price(previous)} -> ₹{format_price(current)}")
+    return {
+        "rule_id": rule["id"],
+        "product": rule["product"],
+        "location": rule["location"],
+        "condition": rule["condition"],
+        "threshold": rule["threshold"],
+        "previous_price": previous,
+        "price": current,
+        "change_percent": round(change_pct, 4),
+        "snapshot_version": snapshot.version,
+        "triggered_at": snapshot.created_at,
+        "message": message,
+    }
+
+alert_rules = AlertRuleIndex()
+alert_rule_store: Optional[AlertRuleStore] = None
+_alert_rules_synced: Optional[datetime] = None
+alert_evaluator = AlertEvaluator(alert_rules)
+alert_queue = QueueAlertSink(ALERT_QUEUE_SIZE)
+
+def add_alert_sink(sink: AlertSink):
+    alert_evaluator.sinks.append(sink)
+    return sink
+
+add_alert_sink(alert_queue)
+if ALERT_WEBHOOK_URL:
+    add_alert_sink(WebhookAlertSink(ALERT_WEBHOOK_URL))
+
+async def sync_alert_rules():
+    """Apply rules created or deleted through other workers (or before a restart)"""
+    global _alert_rules_synced
+    if alert_rule_store is None:
+        return
+    try:
+        # Sorted by updated_at, so the last document seen is the new high-water mark
+        async for doc in alert_rule_store.changes_since(_alert_rules_synced):
+            _alert_rules_synced = doc.pop("updated_at")
+            if doc.pop("deleted"):
+                alert_rules.remove(doc["id"])
+            else:
+                alert_rules.add(doc)
+    except Exception as e:
+        print(f"Alert rule sync error: {e}")
+
+@on_snapshot
+async def evaluate_alerts(snapshot: PriceSnapshot):
+    # One worker evaluates, so every alert is delivered once
+    if is_refresher():
+        alert_evaluator.submit(snapshot)
+
+# Live scrape coordination
+SOURCE_ONE_URL = "https://www.source.one"
+# Comma-separated paths scraped on every refresh (homepage plus category pages)
+SOURCE_ONE_PAGES = [page.strip() for page in os.getenv("SOURCE_ONE_PAGES", "/").split(",") if page.strip()]
+SCRAPE_MIN_INTERVAL_SECONDS = float(os.getenv("SCRAPE_MIN_INTERVAL_SECONDS", "60"))
+SCRAPE_STALE_SECONDS = float(os.getenv("SCRAPE_STALE_SECONDS", "300"))
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "8"))
+SCRAPE_HOST_RATE = float(os.getenv("SCRAPE_HOST_RATE", "2"))  # requests per second per host
+SCRAPE_HOST_BURST = int(os.getenv("SCRAPE_HOST_BURST", "4"))
+SCRAPE_RETRIES = int(os.getenv("SCRAPE_RETRIES", "2"))
+SCRAPE_BACKOFF_SECONDS = float(os.getenv("SCRAPE_BACKOFF_SECONDS", "0.5"))
+
+# Headers to mimic browser request
+SCRAPE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'DNT': '1',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+class PriceSource:
+    """
+    A site to scrape: which pages to fetch and how to parse them
+    Subclasses override page_urls() and/or parser(); a parser has
+    feed(bytes) and close() -> rows like PriceCardExtractor.
+    """
+
+    name = "source"
+
+    def __init__(self, base_url: str, pages: List[str]):
+        self.base_url = base_url.rstrip("/")
+        self.pages = pages
+
+    def page_urls(self) -> List[str]:
+        return [self.base_url + (page if page.startswith("/") else "/" + page) for page in self.pages]
+
+    def parser(self, encoding: str):
+        return PriceCardExtractor(encoding)
+
+class SourceOnePrices(PriceSource):
+    name = "source.one"
+
+# Registered price sources, scraped together on every live refresh
+PRICE_SOURCES: List[PriceSource] = [SourceOnePrices(SOURCE_ONE_URL, SOURCE_ONE_PAGES)]
+
+class TokenBucket:
+    """Async token bucket: at most `burst` back-to-back requests, refilled at `rate`/s"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class RetryableScrapeError(Exception):
+    pass
+
+class SnapshotBuilder:
+    """Collects scraped rows as pages arrive; a later row for the same grade and city wins"""
+
+    def __init__(self):
+        self._rows = {}
+
+    def add(self, rows: List[dict]):
+        for row in rows:
+            self._rows[(row["product"], row.get("location"))] = row
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def build(self) -> PriceTable:
+        return build_price_table(list(self._rows.values()))
+
+class ScrapePipeline:
+    """
+    Fetches every page of every source concurrently
+    - at most `concurrency` requests in flight overall
+    - a token bucket per host
+    - retries with full-jitter exponential backoff on transport errors, 429 and 5xx
+    - conditional GETs per page; a 304 reuses that page's previous rows
+    (rows, changed) is yielded page by page as each one completes.
+    """
+
+    def __init__(self, client, sources: List[PriceSource], concurrency: int, host_rate: float,
+                 host_burst: int, retries: int, backoff: float):
+        self.client = client
+        self.sources = sources
+        self.retries = retries
+        self.backoff = backoff
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._buckets = {}
+        self._validators = {}
+        self._page_rows = {}
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = url.split("://", 1)[-1].split("/", 1)[0]
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.host_rate, self.host_burst)
+        return bucket
+
+    async def run(self):
+        tasks = [
+            asyncio.create_task(self._page(source, url))
+            for source in self.sources
+            for url in source.page_urls()
+        ]
+        try:
+            for next_page in asyncio.as_completed(tasks):
+                yield await next_page
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _page(self, source: PriceSource, url: str) -> Tuple[List[dict], bool]:
+        import httpx
+
+        for attempt in range(self.retries + 1):
+            await self._bucket(url).acquire()
+            try:
+                async with self._semaphore:
+                    return await self._fetch(source, url)
+            except (httpx.TransportError, RetryableScrapeError) as e:
+                if attempt == self.retries:
+                    print(f"Live scraping error for {url}: {e}")
+                    break
+            except Exception as e:
+                # 4xx other than 429, parser errors: retrying would get the same answer
+                print(f"Live scraping error for {url}: {e}")
+                break
+            await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+        # Last known rows for the page, if any
+        return self._page_rows.get(url, []), False
+
+    async def _fetch(self, source: PriceSource, url: str) -> Tuple[List[dict], bool]:
+        import httpx
+
+        started = time.perf_counter()
+        parse_seconds = 0.0
+        etag, last_modified = self._validators.get(url, (None, None))
+        request_headers = {}
+        if etag:
+            request_headers['If-None-Match'] = etag
+        if last_modified:
+            request_headers['If-Modified-Since'] = last_modified
+        async with self.client.stream('GET', url, headers=request_headers) as response:
+            if response.status_code == 304:
+                return self._page_rows.get(url, []), False
+            if response.status_code == 429 or response.status_code >= 500:
+                raise RetryableScrapeError(f"HTTP {response.status_code}")
+            if response.status_code != 200:
+                raise httpx.HTTPStatusError(f"HTTP {response.status_code}", request=response.request, response=response)
+
+            parser = source.parser(response.encoding or 'utf-8')
+            async for chunk in response.aiter_bytes():
+                parse_started = time.perf_counter()
+                parser.feed(chunk)
+                parse_seconds += time.perf_counter() - parse_started
+            parse_started = time.perf_counter()
+            rows = parser.close()
+            parse_seconds += time.perf_counter() - parse_started
+        # Parsing is interleaved with the download; split the page time between the two
+        SCRAPE_STAGE_SECONDS.observe(parse_seconds, "parse")
+        SCRAPE_STAGE_SECONDS.observe(time.perf_counter() - started - parse_seconds, "fetch")
+        self._validators[url] = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        self._page_rows[url] = rows
+        return rows, True
+
+class ScrapeCoordinator:
+    """
+    Single-flight live scraping of the registered price sources
+    - one long-lived pooled HTTP client (HTTP/2 when h2 is installed)
+    - concurrent callers await the same in-flight scrape
+    - within min_interval the current snapshot is returned as-is; up to
+      stale_seconds after that it is returned while a refresh runs behind it
+    - pages are fetched by a ScrapePipeline with conditional GETs
+    """
+
+    def __init__(self, sources: List[PriceSource], min_interval: float, stale_seconds: float):
+        self.sources = sources
+        self.min_interval = min_interval
+        self.stale_seconds = stale_seconds
+        self._client = None
+        self._pipeline: Optional[ScrapePipeline] = None
+        self._inflight: Optional[asyncio.Task] = None
+        self._last_fetch = 0.0
+
+    def _get_client(self):
+        if self._client is None:
+            import httpx
+            try:
+                import h2  # noqa: F401
+                http2 = True
+            except ImportError:
+                http2 = False
+            self._client = httpx.AsyncClient(
+                http2=http2,
+                headers=SCRAPE_HEADERS,
+                follow_redirects=True,
+                timeout=httpx.Timeout(10.0, connect=5.0),
+                limits=httpx.Limits(max_connections=SCRAPE_CONCURRENCY, max_keepalive_connections=SCRAPE_CONCURRENCY, keepalive_expiry=120.0),
+            )
+        return self._client
+
+    def _get_pipeline(self) -> ScrapePipeline:
+        if self._pipeline is None:
+            self._pipeline = ScrapePipeline(
+                self._get_client(), self.sources,
+                concurrency=SCRAPE_CONCURRENCY,
+                host_rate=SCRAPE_HOST_RATE,
+                host_burst=SCRAPE_HOST_BURST,
+                retries=SCRAPE_RETRIES,
+                backoff=SCRAPE_BACKOFF_SECONDS,
+            )
+        return self._pipeline
+
+    async def close(self):
+        if self._inflight and not self._inflight.done():
+            self._inflight.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._pipeline = None
+
+    def _start_fetch(self) -> asyncio.Task:
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._fetch())
+        return self._inflight
+
+    async def scrape(self) -> PriceSnapshot:
+        if not is_refresher():
+            # Only the refresher worker scrapes; the others serve what it published
+            return await get_snapshot()
+        age = time.monotonic() - self._last_fetch
+        if _snapshot is not None and age < self.min_interval:
+            return _snapshot
+        task = self._start_fetch()
+        if _snapshot is not None and age < self.min_interval + self.stale_seconds:
+            # Serve stale while the shared fetch revalidates in the background
+            return _snapshot
+        # Shield so one cancelled caller does not abort the fetch for everyone
+        return await asyncio.shield(task)
+
+    async def refresh(self) -> PriceSnapshot:
+        """Scheduled scrape: joins an in-flight fetch, otherwise starts one regardless of age"""
+        return await asyncio.shield(self._start_fetch())
+
+    async def _fetch(self) -> PriceSnapshot:
+        builder = SnapshotBuilder()
+        changed = False
+        try:
+            async for rows, page_changed in self._get_pipeline().run():
+                builder.add(rows)
+                changed = changed or page_changed
+        except Exception as e:
+            print(f"Live scraping error: {e}")
+            # Fallback to stored data
+            return await get_snapshot()
+        finally:
+            # Failures also count, so a down upstream is retried at most once per interval
+            self._last_fetch = time.monotonic()
+
+        if not len(builder):
+            # Fallback to stored data if scraping fails
+            print("Live scraping didn't find any price cards, using stored data")
+            return await get_snapshot()
+        if not changed:
+            # Every page answered 304 (or failed): the current snapshot still stands
+            return await get_snapshot()
+        print(f"Live scraping extracted {len(builder)} price cards")
+        with stage_timer("extract"):
+            table = builder.build()
+        return await refresh_snapshot(table)
+
+scrape_coordinator = ScrapeCoordinator(PRICE_SOURCES, SCRAPE_MIN_INTERVAL_SECONDS, SCRAPE_STALE_SECONDS)
+
+# Application lifecycle
+# Imported off the event loop once serving, so the first live scrape doesn't pay for them
+LIVE_SCRAPE_MODULES = ("httpx", "h2", "lxml.etree")
+
+_ready = False
+_alert_task: Optional[asyncio.Task] = None
+
+async def import_in_background(*modules: str):
+    """Import modules in a worker thread so the event loop keeps serving; missing optional ones are skipped"""
+    for module in modules:
+        try:
+            await asyncio.to_thread(importlib.import_module, module)
+        except ImportError:
+            pass
+
+def _start_background(coro):
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+async def startup():
+    """Load the snapshot and encode the hot responses before the first request is accepted"""
+    global _ready, _alert_task, _price_store_task
+    # Index creation waits on server selection; only the seed (briefly) waits for it
+    _price_store_task = asyncio.create_task(open_price_store())
+    await start_snapshot_refresher()
+    _alert_task = asyncio.create_task(alert_evaluator.run())
+    warm_response_cache(_snapshot)
+    _start_background(import_in_background(*LIVE_SCRAPE_MODULES))
+    _ready = True
+    elapsed = time.perf_counter() - PROCESS_STARTED
+    STARTUP_SECONDS.set(elapsed)
+    print(f"Ready in {elapsed * 1000:.0f} ms: snapshot v{_snapshot.version}, {len(_snapshot.table)} rows")
+
+async def shutdown():
+    global _ready
+    _ready = False
+    if _alert_task:
+        _alert_task.cancel()
+    if _price_store_task and not _price_store_task.done():
+        _price_store_task.cancel()
+    for sink in alert_evaluator.sinks:
+        await sink.close()
+    await stop_snapshot_refresher()
+
+async def start_snapshot_refresher():
+    global _refresh_task
+    if _snapshot is None:
+        price_statistics.seed(price_history_store, time.time())
+    if shared_snapshot is None:
+        await get_snapshot()
+        _refresh_task = asyncio.create_task(snapshot_refresher())
+        return
+
+    shared_snapshot.try_lead()
+    # Continue from the last published snapshot, if any
+    shared_snapshot.adopt()
+    if is_refresher():
+        print(f"Worker {os.getpid()} is the snapshot refresher")
+        # Keeps the adopted snapshot when there is one; seeds it otherwise
+        await get_snapshot()
+        _refresh_task = asyncio.create_task(snapshot_refresher())
+        return
+    deadline = time.monotonic() + SHARED_SNAPSHOT_WAIT_SECONDS
+    while _snapshot is None and time.monotonic() < deadline:
+        await asyncio.sleep(SHARED_SNAPSHOT_POLL_SECONDS)
+        shared_snapshot.adopt()
+    await get_snapshot()
+    _refresh_task = asyncio.create_task(snapshot_follower())
+
+async def stop_snapshot_refresher():
+    if _refresh_task:
+        _refresh_task.cancel()
+    await scrape_coordinator.close()
+    if client is not None:
+        client.close()
+    if shared_snapshot is not None:
+        shared_snapshot.release()
+
+# Pre-serialised, pre-compressed response bodies keyed by snapshot version
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "32"))
+# Paged/projected /api/prices bodies; kept apart so paging never evicts the warmed responses
+PRICE_PAGE_CACHE_SIZE = int(os.getenv("PRICE_PAGE_CACHE_SIZE", "256"))
+
+class EncodedBody:
+    """A JSON body with its gzip and brotli encodings, each compressed at most once"""
+
+    def __init__(self, etag: str, identity: bytes):
+        self.etag = etag
+        self.identity = identity
+        self._encoded = {}
+
+    def encoded(self, coding: str) -> Optional[bytes]:
+        """Body in the given Content-Encoding; None for br without the brotli module"""
+        if coding not in self._encoded:
+            if coding == "gzip":
+                self._encoded[coding] = gzip.compress(self.identity, compresslevel=6)
+            else:
+                self._encoded[coding] = brotli.compress(self.identity, quality=6) if brotli else None
+        return self._encoded[coding]
+
+class ResponseCache:
+    """
+    Small LRU of JSON bodies, encoded once per (key, snapshot version)
+    With precompress, both encodings are built up front (for warmed responses);
+    otherwise each one is compressed the first time a client asks for it.
+    """
+
+    def __init__(self, maxsize: int, precompress: bool = True):
+        self.maxsize = maxsize
+        self.precompress = precompress
+        self._entries = OrderedDict()
+
+    def get(self, key: str, version: int, build: Callable[[], object]) -> EncodedBody:
+        cache_key = (key, version)
+        # Parameterised keys ("prices-page:compact:...") are counted under their endpoint
+        cache_name = key.partition(":")[0]
+        entry = self._entries.get(cache_key)
+        if entry is not None:
+            self._entries.move_to_end(cache_key)
+            CACHE_REQUESTS.inc(cache_name, "hit")
+            return entry
+        CACHE_REQUESTS.inc(cache_name, "miss")
+        identity = orjson.dumps(build())
+        entry = EncodedBody(f'"{version:x}-{zlib.crc32(identity):08x}"', identity)
+        if self.precompress:
+            entry.encoded("gzip")
+            entry.encoded("br")
+        self._entries[cache_key] = entry
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE)
+price_page_cache = ResponseCache(PRICE_PAGE_CACHE_SIZE, precompress=False)
+
+def _accepts(accept_encoding: str, coding: str) -> bool:
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() == coding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+def cached_json_response(request: Request, key: str, version: int, build: Callable[[], object],
+                         cache: ResponseCache = response_cache) -> Response:
+    """Serve a cached body with ETag/If-None-Match and Content-Encoding negotiation"""
+    entry = cache.get(key, version, build)
+    headers = {"ETag": entry.etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or entry.etag in if_none_match):
+        return Response(status_code=304, headers=headers)
+
+    accept_encoding = request.headers.get("accept-encoding", "")
+    if brotli is not None and _accepts(accept_encoding, "br"):
+        body, headers["Content-Encoding"] = entry.encoded("br"), "br"
+    elif _accepts(accept_encoding, "gzip"):
+        body, headers["Content-Encoding"] = entry.encoded("gzip"), "gzip"
+    else:
+        body = entry.identity
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def serialize_prices(table: PriceTable) -> list:
+    return table.records()
+
+# /api/prices pages and projections
+PRICE_FIELDS = tuple(PolymerPrice.model_fields)
+PRICE_FORMATS = ("json", "compact")
+# Documented by hand: the body depends on fields= and format=
+PRICES_RESPONSES = {200: {
+    "description": "Full prices, prices projected to fields=, or the compact encoding",
+    "content": {"application/json": {"schema": {"oneOf": [
+        {"title": "Prices", "type": "array", "items": PolymerPrice.model_json_schema()},
+        {"title": "Projected prices", "type": "array",
+         "items": {"type": "object", "description": "PolymerPrice with only the fields= fields, in that order"}},
+        {"title": "Compact prices", "type": "array", "items": {"type": "array"},
+         "description": "format=compact: a header row of field names, then one array of values per price"},
+    ]}}},
+}}
+
+def encode_price_cursor(key: Tuple[str, str]) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(key)).decode().rstrip("=")
+
+def decode_price_cursor(cursor: str) -> Tuple[str, str]:
+    """(product, location) of the last row already sent; ValueError if malformed"""
+    try:
+        product, location = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError):
+        raise ValueError(cursor)
+    if not isinstance(product, str) or not isinstance(location, str):
+        raise ValueError(cursor)
+    return product, location
+
+def price_page(snapshot: PriceSnapshot, limit: Optional[int], cursor: Optional[str]) -> Tuple[int, int, Optional[str]]:
+    """
+    [start, end) positions in (product, location) order, and the next page's cursor
+    The cursor names the last key sent rather than an offset, so rows added
+    or removed by a refresh between pages neither repeat nor get skipped.
+    """
+    _, keys = snapshot.key_order
+    start = bisect.bisect_right(keys, decode_price_cursor(cursor)) if cursor else 0
+    end = len(keys) if limit is None else min(start + limit, len(keys))
+    next_cursor = encode_price_cursor(keys[end - 1]) if end < len(keys) else None
+    return start, end, next_cursor
+
+def serialize_price_page(snapshot: PriceSnapshot, start: int, end: int, fields, format: str) -> list:
+    """Objects with the requested fields, or a header row followed by one array per price"""
+    order, _ = snapshot.key_order
+    columns = snapshot.table.columns(fields, order[start:end])
+    if format == "compact":
+        return [list(fields), *zip(*columns)]
+    return [dict(zip(fields, values)) for values in zip(*columns)]
+
+def bootstrap_payload(snapshot: PriceSnapshot) -> dict:
+    facets = catalog_facets.view()
+    return {
+        "version": snapshot.version,
+        "prices": serialize_prices(snapshot.table),
+        "locations": facets["location_names"],
+        "polymer_types": facets["polymer_types"],
+        "favorites": DEFAULT_FAVORITES,
+    }
+
+def warm_response_cache(snapshot: PriceSnapshot):
+    """Encode the dashboard's hot responses for a snapshot before anyone asks for them"""
+    response_cache.get("prices", snapshot.version, lambda: serialize_prices(snapshot.table))
+    response_cache.get("facets", catalog_facets.version, catalog_facets.view)
+    response_cache.get("bootstrap", snapshot.version, lambda: bootstrap_payload(snapshot))
+
+@on_snapshot
+async def warm_snapshot_responses(snapshot: PriceSnapshot):
+    if snapshot is _snapshot:
+        warm_response_cache(snapshot)
+
+# Streaming bulk export
+# pyarrow is optional and slow to import, so it is only loaded for format=parquet
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "10000"))
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+EXPORT_SCHEMAS = {
+    "prices": [
+        ("product", "string"), ("location", "string"), ("min_price", "float64"), ("max_price", "float64"),
+        ("price_change", "float64"), ("price_change_percent", "float64"), ("transit_time", "string"),
+        ("currency", "string"), ("last_updated", "timestamp"),
+    ],
+    "history": [
+        ("product", "string"), ("location", "string"), ("timestamp", "timestamp"),
+        ("min_price", "float64"), ("max_price", "float64"), ("price", "float64"),
+    ],
+}
+
+def export_prices(table: PriceTable, product: Optional[str], location: Optional[str],
+                  start: Optional[datetime], end: Optional[datetime]):
+    """Column chunks of the snapshot rows matching the filters"""
+    rows = table.rows
+    mask = np.ones(len(rows), dtype=bool)
+    if product is not None:
+        mask &= rows["product"] == table.products.codes.get(product, -1)
+    if location is not None:
+        mask &= rows["location"] == table.locations.codes.get(location, -1)
+    if start is not None:
+        mask &= rows["last_updated"] >= int(start.timestamp() * 1_000_000)
+    if end is not None:
+        mask &= rows["last_updated"] <= int(end.timestamp() * 1_000_000)
+    selected = np.flatnonzero(mask)
+    products, locations = table.products.values, table.locations.values
+    transits, currencies = table.transits.values, table.currencies.values
+    for offset in range(0, len(selected), EXPORT_CHUNK_ROWS):
+        chunk = rows[selected[offset:offset + EXPORT_CHUNK_ROWS]]
+        yield {
+            "product": [products[code] for code in chunk["product"].tolist()],
+            "location": [locations[code] for code in chunk["location"].tolist()],
+            "min_price": chunk["min_price"],
+            "max_price": chunk["max_price"],
+            "price_change": chunk["price_change"],
+            "price_change_percent": chunk["price_change_pct"],
+            "transit_time": [transits[code] for code in chunk["transit"].tolist()],
+            "currency": [currencies[code] for code in chunk["currency"].tolist()],
+            "last_updated": chunk["last_updated"].astype("datetime64[us]"),
+        }
+
+def export_history(store: PriceHistoryStore, product: Optional[str], location: Optional[str],
+                   start: Optional[datetime], end: Optional[datetime]):
+    """Column chunks of up to EXPORT_CHUNK_ROWS history points, read straight off the series views"""
+    if product is not None:
+        grades = [(product, loc) for loc in store.locations_by_product.get(product, [])]
+    else:
+        grades = list(store.grades)
+    if location is not None:
+        grades = [grade for grade in grades if grade[1] == location]
+    start_ts = int(start.timestamp()) if start else None
+    end_ts = int(end.timestamp()) if end else None
+
+    parts, size = [], 0
+
+    def flush():
+        products, locations = [], []
+        for (product_name, location_name), part_ts, _, _ in parts:
+            products += [product_name] * len(part_ts)
+            locations += [location_name] * len(part_ts)
+        ts, mins, maxs = (np.concatenate(column) for column in list(zip(*parts))[1:])
+        return {
+            "product": products,
+            "location": locations,
+            "timestamp": ts.astype("datetime64[s]"),
+            "min_price": mins,
+            "max_price": maxs,
+            "price": (mins + maxs) / 2,
+        }
+
+    for grade in grades:
+        ts, mins, maxs = store.series[grade].window(start_ts, end_ts)
+        while len(ts):
+            take = EXPORT_CHUNK_ROWS - size
+            parts.append((grade, ts[:take], mins[:take], maxs[:take]))
+            size += len(parts[-1][1])
+            ts, mins, maxs = ts[take:], mins[take:], maxs[take:]
+            if size == EXPORT_CHUNK_ROWS:
+                yield flush()
+                parts, size = [], 0
+    if parts:
+        yield flush()
+
+def _column_lists(columns) -> list:
+    return [column.tolist() if isinstance(column, np.ndarray) else column for column in columns]
+
+def encode_ndjson(schema, chunks):
+    names = [name for name, _ in schema]
+    for chunk in chunks:
+        yield b"".join(orjson.dumps(dict(zip(names, row))) + b"\n" for row in zip(*_column_lists(chunk.values())))
+
+def encode_csv(schema, chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in schema])
+    for chunk in chunks:
+        columns = [
+            np.datetime_as_string(column) if kind == "timestamp" else column
+            for (_, kind), column in zip(schema, chunk.values())
+        ]
+        writer.writerows(zip(*_column_lists(columns)))
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header only: nothing matched
+        yield buffer.getvalue().encode("utf-8")
+
+class ChunkSink:
+    """Write-only file object whose written bytes are drained by a generator"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+def encode_parquet(schema, chunks):
+    """One row group per chunk, each sent as soon as it is written"""
+    import pyarrow
+    import pyarrow.parquet
+
+    types = {"string": pyarrow.string(), "float64": pyarrow.float64(), "timestamp": pyarrow.timestamp("us")}
+    arrow_schema = pyarrow.schema([(name, types[kind]) for name, kind in schema])
+    sink = ChunkSink()
+    with pyarrow.parquet.ParquetWriter(pyarrow.PythonFile(sink, mode="w"), arrow_schema) as writer:
+        for chunk in chunks:
+            writer.write_table(pyarrow.Table.from_pydict(chunk, schema=arrow_schema))
+            yield sink.drain()
+    yield sink.drain()
+
+EXPORT_ENCODERS = {"ndjson": encode_ndjson, "csv": encode_csv, "parquet": encode_parquet}
 
 # API Endpoints
 @app.get("/")
 async def root():
     return {"message": "Polymer Pricing API", "status": "active"}
 
-@app.get("/api/prices", response_model=List[PolymerPrice])
-async def get_all_prices(live: bool = False):
-    """Get all polymer prices - optionally live scrape"""
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Liveness: the process is up and serving"""
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    """Readiness: startup finished and a price snapshot is loaded"""
+    snapshot = _snapshot
+    if not _ready or snapshot is None:
+        return Response(content=orjson.dumps({"status": "starting"}), status_code=503, media_type="application/json")
+    return {
+        "status": "ready",
+        "version": snapshot.version,
+        "rows": len(snapshot.table),
+        "snapshot_age_seconds": round((datetime.now() - snapshot.created_at).total_seconds(), 3),
+        "refresher": is_refresher(),
+        "database": price_store is not None,
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of request, scrape and cache metrics"""
+    if _snapshot is not None:
+        SNAPSHOT_VERSION.set(_snapshot.version)
+        SNAPSHOT_ROWS.set(len(_snapshot.table))
+    body = "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+@app.get("/api/prices", responses=PRICES_RESPONSES)
+async def get_all_prices(
+    request: Request,
+    live: bool = False,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    format: str = "json"
+):
+    """
+    Get all polymer prices - optionally live scrape
+    Paged requests (limit/cursor) are ordered by product and location; the next
+    page's cursor is returned in the X-Next-Cursor header and the row count in
+    X-Total-Count. fields= keeps only the listed fields and format=compact
+    returns a header row followed by one array per price.
+    """
+    selected = tuple(field.strip() for field in fields.split(",") if field.strip()) if fields else PRICE_FIELDS
+    unknown = [field for field in selected if field not in PRICE_FIELDS]
+    if unknown or not selected:
+        raise HTTPException(status_code=400, detail=f"fields must be a subset of {', '.join(PRICE_FIELDS)}")
+    if format not in PRICE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(PRICE_FORMATS)}")
     try:
         if live:
             # Use live scraping
-            prices = await scrape_source_one_live()
+            snapshot = await scrape_coordinator.scrape()
         else:
-            # Use stored data (faster)
-            prices = await get_source_one_prices()
-        return prices
+            # Use the shared snapshot (faster)
+            snapshot = await get_snapshot()
+        if limit is None and cursor is None and fields is None and format == "json":
+            response = cached_json_response(request, "prices", snapshot.version,
+                                            lambda: serialize_prices(snapshot.table))
+            # Lets stream clients check that deltas apply on top of this list
+            response.headers["X-Snapshot-Version"] = str(snapshot.version)
+            return response
+
+        try:
+            start, end, next_cursor = price_page(snapshot, limit, cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        # Keyed on the resolved page rather than the raw cursor, so equivalent requests share an entry
+        key = f"prices-page:{format}:{','.join(selected)}:{start}:{end}"
+        response = cached_json_response(request, key, snapshot.version,
+                                        lambda: serialize_price_page(snapshot, start, end, selected, format),
+                                        cache=price_page_cache)
+        response.headers["X-Total-Count"] = str(len(snapshot.table))
+        response.headers["X-Snapshot-Version"] = str(snapshot.version)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching prices: {str(e)}")
 
+@app.get("/api/stream")
+async def stream_prices(request: Request):
+    """
+    Server-Sent Events stream of price deltas keyed by product and location
+    Events: "hello" (current version), "delta" (upserts/removed rows) and
+    "resync" (client fell behind or reconnected across versions; reload /api/prices).
+    """
+    snapshot = await get_snapshot()
+    queue = price_broadcaster.subscribe()
+    last_event_id = request.headers.get("last-event-id")
+
+    async def events():
+        try:
+            if last_event_id and last_event_id != str(price_broadcaster.version):
+                yield sse_frame("resync", {"version": price_broadcaster.version}, price_broadcaster.version)
+            else:
+                yield sse_frame("hello", {"version": snapshot.version}, snapshot.version)
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": ping\n\n"
+                    continue
+                yield frame
+        finally:
+            price_broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get("/api/scrape-live")
 async def scrape_live():
     """Trigger live scraping from source.one"""
@@ -238,62 +2983,89 @@ async def scrape_live():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Live scraping failed: {str(e)}")
 
-@app.get("/api/prices/search")
+@app.get("/api/prices/search", response_model=List[PolymerPrice])
 async def search_prices(
+    response: Response,
     q: Optional[str] = None,
     location: Optional[str] = None,
     min_price: Optional[float] = None,
-    max_price: Optional[float] = None
+    max_price: Optional[float] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None
 ):
-    """Search prices with filters"""
+    """
+    Search prices with filters
+    Pages are requested with limit; the next page's cursor is returned in the
+    X-Next-Cursor header and the total match count in X-Total-Count.
+    """
+    if sort and sort.lstrip("-") not in SEARCH_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(SEARCH_SORT_FIELDS)} (prefix '-' for descending)")
     try:
-        all_prices = await get_source_one_prices()
-        
-        # Apply filters
-        filtered_prices = all_prices
-        
-        if q:
-            filtered_prices = [p for p in filtered_prices if q.upper() in p.product.upper()]
+        offset = int(cursor) if cursor else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        snapshot = await get_snapshot()
+        rows = snapshot.search_index.search(q, location, min_price, max_price, sort)
         
-        if location:
-            filtered_prices = [p for p in filtered_prices if location.lower() in p.location.lower()]
-            
-        if min_price:
-            filtered_prices = [p for p in filtered_prices if p.min_price >= min_price]
-            
-        if max_price:
-            filtered_prices = [p for p in filtered_prices if p.max_price <= max_price]
+        response.headers["X-Total-Count"] = str(len(rows))
+        if limit is not None:
+            end = offset + limit
+            if end < len(rows):
+                response.headers["X-Next-Cursor"] = str(end)
+            rows = rows[offset:end]
+        elif offset:
+            rows = rows[offset:]
         
-        return filtered_prices
+        return snapshot.table.page(rows)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching prices: {str(e)}")
 
 @app.get("/api/locations")
 async def get_locations():
-    """Get available locations"""
-    return {"locations": LOCATIONS}
+    """Get locations present in the current price data"""
+    await get_snapshot()
+    return {"locations": catalog_facets.view()["location_names"]}
 
 @app.get("/api/polymer-types")
 async def get_polymer_types():
     """Get available polymer types"""
     try:
-        prices = await get_source_one_prices()
-        polymer_types = list(set([p.product.split()[0] for p in prices]))
-        return {"polymer_types": sorted(polymer_types)}
+        await get_snapshot()
+        return {"polymer_types": catalog_facets.view()["polymer_types"]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching polymer types: {str(e)}")
 
+@app.get("/api/facets")
+async def get_facets(request: Request):
+    """Family -> grade -> location facets with row counts and price bounds"""
+    await get_snapshot()
+    return cached_json_response(request, "facets", catalog_facets.version, catalog_facets.view)
+
+# User's favorite polymer grades (mock data for now)
+DEFAULT_FAVORITES = [
+    "HD GPBM",
+    "PP RAFFIA", 
+    "PVC K57",
+    "LD GP"
+]
+
+@app.get("/api/bootstrap")
+async def get_bootstrap(request: Request):
+    """Everything the dashboard needs on first render, in one response"""
+    try:
+        snapshot = await get_snapshot()
+        return cached_json_response(request, "bootstrap", snapshot.version, lambda: bootstrap_payload(snapshot))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error building bootstrap payload: {str(e)}")
+
 @app.get("/api/favorites")
 async def get_favorites():
     """Get user's favorite polymer grades (mock data for now)"""
-    return {
-        "favorites": [
-            "HD GPBM",
-            "PP RAFFIA", 
-            "PVC K57",
-            "LD GP"
-        ]
-    }
+    return {"favorites": DEFAULT_FAVORITES}
 
 @app.post("/api/favorites/{product_name}")
 async def add_favorite(product_name: str):
@@ -306,22 +3078,134 @@ async def remove_favorite(product_name: str):
     return {"message": f"Removed {product_name} from favorites", "status": "success"}
 
 @app.get("/api/price-history/{product_name}")
-async def get_price_history(product_name: str):
-    """Get price history for a specific product"""
-    # Mock historical data
-    history = []
-    base_price = 100
-    for i in range(30):  # 30 days of data
-        date = datetime.now()
-        date = date.replace(day=max(1, date.day - i))
-        price = base_price + random.uniform(-10, 10)
-        history.append({
-            "date": date,
-            "price": round(price, 2)
-        })
+async def get_price_history(
+    product_name: str,
+    location: Optional[str] = None,
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+    interval: Optional[str] = None
+):
+    """Get price history for a product, optionally downsampled to 1h/1d/1w buckets"""
+    if interval is not None and interval not in HISTORY_INTERVALS:
+        raise HTTPException(status_code=400, detail=f"interval must be one of {', '.join(HISTORY_INTERVALS)}")
+    from_, to = market_time(from_), market_time(to)
+    start = int(from_.timestamp()) if from_ else None
+    end = int(to.timestamp()) if to else None
+    ts, min_prices, max_prices = price_history_store.query(product_name, location, start, end)
     
-    return {"product": product_name, "history": history}
+    if interval:
+        history = downsample_ohlc(ts, min_prices, max_prices, interval)
+    else:
+        mid = (min_prices + max_prices) / 2
+        history = [
+            {
+                "date": datetime.fromtimestamp(int(t), MARKET_TZ),
+                "price": round(float(price), 2),
+                "min_price": float(low),
+                "max_price": float(high),
+            }
+            for t, price, low, high in zip(ts, mid, min_prices, max_prices)
+        ]
+    
+    return {"product": product_name, "interval": interval, "history": history}
+
+@app.get("/api/export")
+async def export_data(
+    dataset: str = "prices",
+    format: str = "ndjson",
+    product: Optional[str] = None,
+    location: Optional[str] = None,
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+):
+    """Stream current prices or price history as NDJSON, CSV or Parquet"""
+    if dataset not in EXPORT_SCHEMAS:
+        raise HTTPException(status_code=400, detail=f"dataset must be one of {', '.join(EXPORT_SCHEMAS)}")
+    if format not in EXPORT_ENCODERS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_ENCODERS)}")
+    if format == "parquet" and not PYARROW_AVAILABLE:
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow")
+    from_, to = market_time(from_), market_time(to)
+    if dataset == "prices":
+        chunks = export_prices((await get_snapshot()).table, product, location, from_, to)
+    else:
+        chunks = export_history(price_history_store, product, location, from_, to)
+    # Chunks are produced and encoded lazily as the client reads
+    filename = f"{dataset}.{format}"
+    return StreamingResponse(
+        EXPORT_ENCODERS[format](EXPORT_SCHEMAS[dataset], chunks),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@app.post("/api/alerts")
+async def create_alert(rule: AlertRuleCreate):
+    """Create a price alert for a grade in a city"""
+    if rule.condition not in ALERT_CONDITIONS:
+        raise HTTPException(status_code=400, detail=f"condition must be one of {', '.join(ALERT_CONDITIONS)}")
+    if rule.threshold <= 0:
+        raise HTTPException(status_code=400, detail="threshold must be positive")
+    alert = {
+        "id": str(uuid.uuid4()),
+        "product": rule.product,
+        "location": rule.location,
+        "condition": rule.condition,
+        "threshold": rule.threshold,
+        "created_at": datetime.now(),
+    }
+    alert_rules.add(alert)
+    if alert_rule_store is not None:
+        try:
+            await alert_rule_store.save(alert)
+        except Exception as e:
+            print(f"Alert rule save error: {e}")
+    return alert
+
+@app.get("/api/alerts")
+async def list_alerts(product: Optional[str] = None, location: Optional[str] = None):
+    """List alert rules, optionally for one product and/or location"""
+    await sync_alert_rules()
+    return {"alerts": alert_rules.list(product, location)}
+
+@app.delete("/api/alerts/{rule_id}")
+async def delete_alert(rule_id: str):
+    """Delete an alert rule"""
+    await sync_alert_rules()
+    if not alert_rules.remove(rule_id):
+        raise HTTPException(status_code=404, detail=f"Alert {rule_id} not found")
+    if alert_rule_store is not None:
+        try:
+            await alert_rule_store.delete(rule_id)
+        except Exception as e:
+            print(f"Alert rule delete error: {e}")
+    return {"message": f"Deleted alert {rule_id}", "status": "success"}
+
+@app.get("/api/price-stats/{product_name}")
+async def get_price_stats(product_name: str, location: Optional[str] = None):
+    """Get the latest price change and 7/30-day rolling statistics per location"""
+    stats = price_statistics.summary(product_name, location)
+    if not stats:
+        raise HTTPException(status_code=404, detail=f"No price statistics for {product_name}")
+    return {"product": product_name, "stats": stats}
+
+@app.get("/api/landed-cost")
+async def get_landed_cost(request: Request, product: Optional[str] = None, location: Optional[str] = None):
+    """Cheapest delivered cost (price + freight + tax) per grade and destination city"""
+    snapshot = await get_snapshot()
+    landed_costs = snapshot.landed_costs
+    if product is None and location is None:
+        return cached_json_response(request, "landed-cost", snapshot.version, landed_costs.grid)
+    if product is not None and product not in landed_costs.product_codes:
+        raise HTTPException(status_code=404, detail=f"No prices for {product}")
+    if location is not None and location not in landed_costs.destination_codes:
+        raise HTTPException(status_code=404, detail=f"Unknown location {location}")
+    return {"landed_costs": landed_costs.entries(product, location)}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers > 1:
+        # One worker refreshes; the rest map its snapshot (see SharedSnapshot)
+        uvicorn.run("server:app", host="0.0.0.0", port=8001, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
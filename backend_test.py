@@ -1,11 +1,12 @@
+import os
 import requests
 import unittest
 import json
 import time
 from datetime import datetime
 
-# Get the backend URL from the frontend .env file
-BACKEND_URL = "https://f174f490-d3de-433b-ab49-efdd4123ba8f.preview.emergentagent.com"
+# Get the backend URL from the frontend .env file; override with BACKEND_URL for a local server
+BACKEND_URL = os.getenv("BACKEND_URL", "https://f174f490-d3de-433b-ab49-efdd4123ba8f.preview.emergentagent.com")
 
 class PolymerPricingAPITest(unittest.TestCase):
     """Test suite for the Polymer Pricing API"""
@@ -200,6 +201,281 @@ class PolymerPricingAPITest(unittest.TestCase):
             
         print("✅ Fallback mechanism test passed - always received data from live endpoint")
 
+    def test_prices_snapshot_consistency(self):
+        """Test that back-to-back reads are served from the same snapshot"""
+        first = requests.get(f"{BACKEND_URL}/api/prices")
+        second = requests.get(f"{BACKEND_URL}/api/prices")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        
+        first_ids = [item["id"] for item in first.json()]
+        second_ids = [item["id"] for item in second.json()]
+        self.assertEqual(first_ids, second_ids, "Price ids changed between calls")
+        
+        # Search results come from the same snapshot as the full list
+        search_ids = {item["id"] for item in requests.get(f"{BACKEND_URL}/api/prices/search?q=PP").json()}
+        self.assertTrue(search_ids.issubset(set(second_ids)), "Search returned ids not in the price list")
+        
+        print(f"✅ Snapshot consistency test passed - {len(first_ids)} stable ids")
+
+    def test_price_history_downsampling(self):
+        """Test the /api/price-history endpoint with interval buckets"""
+        response = requests.get(f"{BACKEND_URL}/api/price-history/HD FILM?interval=1d")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["interval"], "1d")
+        for bucket in data["history"]:
+            for field in ["date", "price", "open", "high", "low", "close", "count"]:
+                self.assertIn(field, bucket)
+            self.assertLessEqual(bucket["low"], bucket["high"])
+        
+        # Unknown intervals are rejected
+        response = requests.get(f"{BACKEND_URL}/api/price-history/HD FILM?interval=2d")
+        self.assertEqual(response.status_code, 400)
+        
+        print(f"✅ Price history downsampling test passed - {len(data['history'])} daily buckets")
+
+    def test_search_prices_pagination(self):
+        """Test range filters, sorting and cursor pagination on /api/prices/search"""
+        # min_price=0 is a real filter, not "no filter"
+        response = requests.get(f"{BACKEND_URL}/api/prices/search?min_price=0&sort=min_price")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(int(response.headers["X-Total-Count"]), len(data))
+        prices = [item["min_price"] for item in data]
+        self.assertEqual(prices, sorted(prices), "Results not sorted by min_price")
+        
+        # Walk the same query two rows at a time
+        paged = []
+        cursor = None
+        while True:
+            url = f"{BACKEND_URL}/api/prices/search?min_price=0&sort=min_price&limit=2"
+            if cursor:
+                url += f"&cursor={cursor}"
+            page = requests.get(url)
+            self.assertEqual(page.status_code, 200)
+            paged.extend(item["id"] for item in page.json())
+            cursor = page.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        self.assertEqual(paged, [item["id"] for item in data])
+        
+        print(f"✅ Search pagination test passed - {len(paged)} rows paged")
+
+    def test_facets_endpoint(self):
+        """Test the /api/facets endpoint agrees with the price list"""
+        response = requests.get(f"{BACKEND_URL}/api/facets")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        for field in ["version", "families", "locations", "polymer_types"]:
+            self.assertIn(field, data)
+        
+        prices = requests.get(f"{BACKEND_URL}/api/prices").json()
+        self.assertEqual(sum(family["count"] for family in data["families"]), len(prices))
+        self.assertEqual(sorted({p["location"] for p in prices}),
+                         [loc["location"] for loc in data["locations"]])
+        
+        print(f"✅ Facets test passed - {len(data['families'])} families, {len(data['locations'])} locations")
+
+    def test_price_stream(self):
+        """Test the /api/stream endpoint opens with a hello event"""
+        response = requests.get(f"{BACKEND_URL}/api/stream", stream=True, timeout=10)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+        
+        lines = []
+        for line in response.iter_lines(decode_unicode=True):
+            if not line:
+                break
+            lines.append(line)
+        response.close()
+        self.assertIn("event: hello", lines)
+        
+        # The list carries the snapshot version that deltas are based on
+        version = requests.get(f"{BACKEND_URL}/api/prices").headers.get("X-Snapshot-Version")
+        self.assertIsNotNone(version, "X-Snapshot-Version header missing")
+        self.assertTrue(version.isdigit())
+        
+        print("✅ Price stream test passed - received hello event")
+
+    def test_prices_etag(self):
+        """Test that /api/prices answers If-None-Match with 304 for an unchanged snapshot"""
+        response = requests.get(f"{BACKEND_URL}/api/prices")
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers.get("ETag")
+        self.assertIsNotNone(etag, "ETag header missing")
+        
+        response = requests.get(f"{BACKEND_URL}/api/prices", headers={"If-None-Match": etag})
+        # A refresh may land between the two calls; then the new body comes back
+        self.assertIn(response.status_code, (200, 304))
+        if response.status_code == 304:
+            self.assertEqual(response.content, b"")
+        
+        print(f"✅ Prices ETag test passed - {etag}")
+
+    def test_bootstrap_endpoint(self):
+        """Test the /api/bootstrap endpoint bundles the startup data"""
+        response = requests.get(f"{BACKEND_URL}/api/bootstrap")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        for field in ["version", "prices", "locations", "polymer_types", "favorites"]:
+            self.assertIn(field, data, f"Field {field} missing from bootstrap payload")
+        
+        self.assertTrue(len(data["prices"]) > 0, "No prices in bootstrap payload")
+        self.assertEqual(data["favorites"], requests.get(f"{BACKEND_URL}/api/favorites").json()["favorites"])
+        
+        print(f"✅ Bootstrap test passed - {len(data['prices'])} prices, version {data['version']}")
+
+    def test_metrics_endpoint(self):
+        """Test /metrics exposes request and snapshot metrics in Prometheus format"""
+        requests.get(f"{BACKEND_URL}/api/prices")
+        response = requests.get(f"{BACKEND_URL}/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+        
+        body = response.text
+        self.assertIn('http_requests_total{method="GET",route="/api/prices",status="200"}', body)
+        self.assertIn('http_request_duration_seconds_bucket{method="GET",route="/api/prices",le="+Inf"}', body)
+        self.assertIn("price_snapshot_version", body)
+        
+        print("✅ Metrics test passed")
+
+    def test_price_stats_endpoint(self):
+        """Test /api/price-stats returns change and rolling windows per location"""
+        response = requests.get(f"{BACKEND_URL}/api/price-stats/HD FILM")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["product"], "HD FILM")
+        self.assertTrue(len(data["stats"]) > 0, "No statistics returned")
+        
+        row = data["stats"][0]
+        for field in ["location", "price", "price_change", "price_change_percent", "7d", "30d"]:
+            self.assertIn(field, row, f"Field {field} missing from price stats")
+        for field in ["moving_average", "min", "max", "volatility", "days"]:
+            self.assertIn(field, row["7d"], f"Field {field} missing from 7d window")
+        
+        # Change is now derived from snapshots, so it is stable between calls
+        prices = {p["id"]: p["price_change"] for p in requests.get(f"{BACKEND_URL}/api/prices").json()}
+        again = {p["id"]: p["price_change"] for p in requests.get(f"{BACKEND_URL}/api/prices").json()}
+        self.assertEqual(prices, again)
+        
+        missing = requests.get(f"{BACKEND_URL}/api/price-stats/NOT A GRADE")
+        self.assertEqual(missing.status_code, 404)
+        
+        print(f"✅ Price stats test passed - {len(data['stats'])} locations")
+
+    def test_export_endpoint(self):
+        """Test /api/export streams prices and history as NDJSON and CSV"""
+        response = requests.get(f"{BACKEND_URL}/api/export", params={"dataset": "prices", "format": "ndjson"})
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        self.assertTrue(len(rows) > 0, "No rows exported")
+        for field in ["product", "location", "min_price", "max_price", "last_updated"]:
+            self.assertIn(field, rows[0], f"Field {field} missing from export row")
+        
+        response = requests.get(f"{BACKEND_URL}/api/export",
+                                params={"dataset": "history", "format": "csv", "product": "HD FILM"})
+        self.assertEqual(response.status_code, 200)
+        lines = response.text.splitlines()
+        self.assertEqual(lines[0], "product,location,timestamp,min_price,max_price,price")
+        self.assertTrue(all(line.startswith("HD FILM,") for line in lines[1:]))
+        
+        response = requests.get(f"{BACKEND_URL}/api/export", params={"format": "xml"})
+        self.assertEqual(response.status_code, 400)
+        
+        print(f"✅ Export test passed - {len(rows)} price rows, {len(lines) - 1} history rows")
+
+    def test_health_endpoints(self):
+        """Test /healthz liveness and /readyz readiness"""
+        response = requests.get(f"{BACKEND_URL}/healthz")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "ok")
+        
+        response = requests.get(f"{BACKEND_URL}/readyz")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["status"], "ready")
+        self.assertTrue(data["rows"] > 0, "Ready without a loaded snapshot")
+        
+        print(f"✅ Health test passed - snapshot v{data['version']}, {data['rows']} rows")
+
+    def test_alerts_endpoints(self):
+        """Test creating, listing and deleting price alerts"""
+        rule = {"product": "PP RAFFIA", "location": "Mumbai", "condition": "above", "threshold": 100}
+        response = requests.post(f"{BACKEND_URL}/api/alerts", json=rule)
+        self.assertEqual(response.status_code, 200)
+        alert = response.json()
+        for field in ["id", "product", "location", "condition", "threshold"]:
+            self.assertIn(field, alert, f"Field {field} missing from alert")
+        
+        alerts = requests.get(f"{BACKEND_URL}/api/alerts", params={"product": "PP RAFFIA"}).json()["alerts"]
+        self.assertIn(alert["id"], [a["id"] for a in alerts])
+        
+        bad = requests.post(f"{BACKEND_URL}/api/alerts", json={**rule, "condition": "sideways"})
+        self.assertEqual(bad.status_code, 400)
+        
+        response = requests.delete(f"{BACKEND_URL}/api/alerts/{alert['id']}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(requests.delete(f"{BACKEND_URL}/api/alerts/{alert['id']}").status_code, 404)
+        
+        print("✅ Alerts test passed")
+
+    def test_landed_cost_endpoint(self):
+        """Test the landed cost grid and per-grade lookup"""
+        response = requests.get(f"{BACKEND_URL}/api/landed-cost")
+        self.assertEqual(response.status_code, 200)
+        grid = response.json()
+        for field in ["products", "locations", "landed_price", "origins", "transit_days"]:
+            self.assertIn(field, grid, f"Field {field} missing from landed cost grid")
+        self.assertEqual(len(grid["landed_price"]), len(grid["products"]))
+
+        product = grid["products"][0]
+        response = requests.get(f"{BACKEND_URL}/api/landed-cost", params={"product": product, "location": "Delhi"})
+        self.assertEqual(response.status_code, 200)
+        entry, = response.json()["landed_costs"]
+        self.assertEqual(entry["product"], product)
+        self.assertEqual(entry["location"], "Delhi")
+        if entry["landed_price"] is not None:
+            self.assertGreaterEqual(entry["landed_price"], entry["price"])
+
+        response = requests.get(f"{BACKEND_URL}/api/landed-cost", params={"location": "Atlantis"})
+        self.assertEqual(response.status_code, 404)
+
+        print("✅ Landed cost test passed")
+
+    def test_prices_pagination_and_projection(self):
+        """Test keyset pages, fields= projection and the compact encoding on /api/prices"""
+        total = len(requests.get(f"{BACKEND_URL}/api/prices").json())
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 10, "fields": "product,location"}
+            if cursor:
+                params["cursor"] = cursor
+            response = requests.get(f"{BACKEND_URL}/api/prices", params=params)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            self.assertLessEqual(len(page), 10)
+            for price in page:
+                self.assertEqual(set(price), {"product", "location"})
+            seen += [(price["product"], price["location"]) for price in page]
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        self.assertEqual(len(seen), total)
+        self.assertEqual(len(set(seen)), total)
+
+        response = requests.get(f"{BACKEND_URL}/api/prices", params={"format": "compact", "fields": "product,min_price"})
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()
+        self.assertEqual(rows[0], ["product", "min_price"])
+        self.assertEqual(len(rows), total + 1)
+
+        self.assertEqual(requests.get(f"{BACKEND_URL}/api/prices", params={"fields": "bogus"}).status_code, 400)
+        self.assertEqual(requests.get(f"{BACKEND_URL}/api/prices", params={"cursor": "!!"}).status_code, 400)
+
+        print("✅ Prices pagination test passed")
+
 if __name__ == "__main__":
     print(f"Running tests against backend at {BACKEND_URL}")
     unittest.main(argv=['first-arg-is-ignored'], exit=False)
\ No newline at end of file
@@ -1,9 +1,30 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import './App.css';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL || 'http://localhost:8001';
 
+const priceKey = (price) => `${price.product}|${price.location}`;
+
+// Merge a pushed delta (changed and removed rows) into the current list
+const applyPriceDelta = (prices, delta) => {
+  const removed = new Set(delta.removed.map(([product, location]) => `${product}|${location}`));
+  const upserts = new Map(delta.upserts.map(price => [priceKey(price), price]));
+  const next = [];
+  prices.forEach(price => {
+    const key = priceKey(price);
+    if (removed.has(key)) return;
+    if (upserts.has(key)) {
+      next.push(upserts.get(key));
+      upserts.delete(key);
+    } else {
+      next.push(price);
+    }
+  });
+  upserts.forEach(price => next.push(price));
+  return next;
+};
+
 function App() {
   const [prices, setPrices] = useState([]);
   const [filteredPrices, setFilteredPrices] = useState([]);
@@ -16,13 +37,41 @@ function App() {
   const [favorites, setFavorites] = useState([]);
   const [showFavorites, setShowFavorites] = useState(false);
   const [isLiveUpdating, setIsLiveUpdating] = useState(false);
+  // Snapshot version of the list in `prices`, and the newest one the stream has announced
+  const pricesVersion = useRef(null);
+  const streamVersion = useRef(null);
 
   // Fetch initial data
   useEffect(() => {
-    fetchPrices();
-    fetchLocations();
-    fetchPolymerTypes();
-    fetchFavorites();
+    fetchBootstrap();
+  }, []);
+
+  // Apply price deltas pushed by the backend instead of polling
+  useEffect(() => {
+    const source = new EventSource(`${BACKEND_URL}/api/stream`);
+    source.addEventListener('hello', (event) => {
+      const { version } = JSON.parse(event.data);
+      streamVersion.current = version;
+      // A snapshot landed between loading the list and connecting
+      if (pricesVersion.current !== null && version !== pricesVersion.current) fetchPrices();
+    });
+    source.addEventListener('delta', (event) => {
+      const delta = JSON.parse(event.data);
+      streamVersion.current = delta.version;
+      // Until the list has loaded its version is unknown; the load compares against streamVersion
+      if (pricesVersion.current === null || delta.version <= pricesVersion.current) return;
+      if (delta.base_version !== pricesVersion.current) {
+        fetchPrices();
+        return;
+      }
+      pricesVersion.current = delta.version;
+      // Unchanged snapshots arrive as empty deltas that only advance the version
+      if (delta.upserts.length || delta.removed.length) {
+        setPrices(current => applyPriceDelta(current, delta));
+      }
+    });
+    source.addEventListener('resync', () => fetchPrices());
+    return () => source.close();
   }, []);
 
   // Filter prices when search/filters change
@@ -30,12 +79,36 @@ function App() {
     filterPrices();
   }, [prices, searchQuery, selectedLocation, selectedPolymerType, showFavorites]);
 
+  // Prices, filter options and favorites in a single round-trip
+  const fetchBootstrap = async () => {
+    try {
+      setLoading(true);
+      const response = await axios.get(`${BACKEND_URL}/api/bootstrap`);
+      setPrices(response.data.prices);
+      loadedVersion(response.data.version);
+      setLocations(response.data.locations);
+      setPolymerTypes(response.data.polymer_types);
+      setFavorites(response.data.favorites);
+      setLoading(false);
+    } catch (error) {
+      console.error('Error fetching bootstrap data:', error);
+      setLoading(false);
+    }
+  };
+
+  // Record the loaded list's version; reload if the stream is already past it
+  const loadedVersion = (version) => {
+    pricesVersion.current = version;
+    if (streamVersion.current !== null && streamVersion.current > version) fetchPrices();
+  };
+
   const fetchPrices = async (live = false) => {
     try {
       setLoading(true);
       const url = live ? `${BACKEND_URL}/api/prices?live=true` : `${BACKEND_URL}/api/prices`;
       const response = await axios.get(url);
       setPrices(response.data);
+      loadedVersion(Number(response.headers['x-snapshot-version']));
       setLoading(false);
     } catch (error) {
       console.error('Error fetching prices:', error);
@@ -54,33 +127,6 @@ function App() {
     }
   };
 
-  const fetchLocations = async () => {
-    try {
-      const response = await axios.get(`${BACKEND_URL}/api/locations`);
-      setLocations(response.data.locations);
-    } catch (error) {
-      console.error('Error fetching locations:', error);
-    }
-  };
-
-  const fetchPolymerTypes = async () => {
-    try {
-      const response = await axios.get(`${BACKEND_URL}/api/polymer-types`);
-      setPolymerTypes(response.data.polymer_types);
-    } catch (error) {
-      console.error('Error fetching polymer types:', error);
-    }
-  };
-
-  const fetchFavorites = async () => {
-    try {
-      const response = await axios.get(`${BACKEND_URL}/api/favorites`);
-      setFavorites(response.data.favorites);
-    } catch (error) {
-      console.error('Error fetching favorites:', error);
-    }
-  };
-
   const filterPrices = () => {
     let filtered = prices;
 
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+BACKEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+SOURCE_ONE_PAGE = os.path.join(BACKEND, "benchmarks", "fixtures", "source_one_synthetic.html")
+
+# server.py lives in backend/ and is imported as a top-level module
+sys.path.insert(0, BACKEND)
+
+
+@pytest.fixture(scope="session")
+def source_one_page() -> bytes:
+    """The synthetic source.one home page (31 price cards), as raw bytes"""
+    with open(SOURCE_ONE_PAGE, "rb") as f:
+        return f.read()
+
+
+@pytest.fixture
+def anyio_backend():
+    """Tests marked @pytest.mark.anyio run on asyncio, like the app"""
+    return "asyncio"
@@ -0,0 +1,121 @@
+import asyncio
+import random
+
+import httpx
+import pytest
+
+import server
+
+
+def make_rule(rule_id, condition, threshold, product="PP RAFFIA", location="Pune"):
+    return {"id": rule_id, "product": product, "location": location,
+            "condition": condition, "threshold": threshold}
+
+
+def brute_force(rules, previous, current):
+    fired = set()
+    for rule in rules:
+        threshold = rule["threshold"]
+        if rule["condition"] == "above" and previous < threshold <= current:
+            fired.add(rule["id"])
+        elif rule["condition"] == "below" and current <= threshold < previous:
+            fired.add(rule["id"])
+        elif rule["condition"] == "move" and abs(current / previous - 1) * 100 >= threshold:
+            fired.add(rule["id"])
+    return fired
+
+
+def test_index_matches_brute_force():
+    rng = random.Random(0)
+    index = server.AlertRuleIndex()
+    rules = []
+    for i in range(2000):
+        condition = rng.choice(server.ALERT_CONDITIONS)
+        threshold = round(rng.uniform(0.1, 5), 2) if condition == "move" else float(rng.randint(90, 100))
+        rules.append(make_rule(str(i), condition, threshold))
+        index.add(rules[-1])
+    for rule in rules[::3]:
+        assert index.remove(rule["id"])
+    live = rules[1::3] + rules[2::3]
+
+    for _ in range(200):
+        previous, current = rng.choice(range(88, 102)), rng.choice(range(88, 102))
+        matched = {rule["id"] for rule in index.match("PP RAFFIA", "Pune", previous, current)}
+        assert matched == brute_force(live, previous, current)
+    assert index.match("PP RAFFIA", "Delhi", 90, 100) == []
+
+
+def test_evaluator_only_reports_moved_grades():
+    async def run():
+        index = server.AlertRuleIndex()
+        evaluator = server.AlertEvaluator(index)
+        sink = server.QueueAlertSink(10)
+        evaluator.sinks.append(sink)
+        table = await server.get_source_one_prices()
+        row = table.product_names().index("PP RAFFIA")
+        location = table.location_names()[row]
+        index.add(make_rule("up", "above", 95, location=location))
+        index.add(make_rule("other", "above", 1, product="HD FILM", location=location))
+
+        def snapshot(version, offset):
+            moved = server.PriceTable(table.rows.copy(), table.products, table.locations,
+                                      table.transits, table.currencies)
+            moved.rows["min_price"][row] += offset
+            moved.rows["max_price"][row] += offset
+            return server.PriceSnapshot(version=version, created_at=server.datetime.now(), table=moved)
+
+        for version, offset in enumerate([0, 0, 2, 2, -2], start=1):
+            notifications = evaluator.evaluate(snapshot(version, offset))
+            if notifications:
+                await evaluator.deliver(notifications)
+        return [sink.queue.get_nowait() for _ in range(sink.queue.qsize())]
+
+    (notification,) = asyncio.run(run())
+    assert notification["rule_id"] == "up"
+    assert notification["snapshot_version"] == 3
+    assert notification["previous_price"] < 95 <= notification["price"]
+
+
+def test_rules_sync_between_workers(monkeypatch):
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+
+    async def run():
+        store = server.AlertRuleStore(mongomock_motor.AsyncMongoMockClient()["polymer_pricing_test"])
+        monkeypatch.setattr(server, "alert_rule_store", store)
+        monkeypatch.setattr(server, "alert_rules", server.AlertRuleIndex())
+        monkeypatch.setattr(server, "_alert_rules_synced", None)
+        # Another worker creates two rules and deletes one
+        await store.save(make_rule("kept", "above", 95))
+        await store.save(make_rule("gone", "below", 90))
+        await server.sync_alert_rules()
+        synced = sorted(server.alert_rules.rules)
+        await store.delete("gone")
+        await server.sync_alert_rules()
+        return synced, sorted(server.alert_rules.rules)
+
+    synced, after_delete = asyncio.run(run())
+    assert synced == ["gone", "kept"]
+    assert after_delete == ["kept"]
+
+
+def test_webhook_sink_reuses_one_client():
+    posted = []
+
+    def handler(request):
+        posted.append(server.orjson.loads(request.content))
+        return httpx.Response(204)
+
+    async def run():
+        sink = server.WebhookAlertSink("http://hooks.test/alerts")
+        sink._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        client = sink._get_client()
+        await sink.send([{"rule_id": "a"}])
+        await sink.send([{"rule_id": "b"}])
+        assert sink._get_client() is client
+        await sink.close()
+        assert client.is_closed
+
+    asyncio.run(run())
+    assert posted == [{"alerts": [{"rule_id": "a"}]}, {"alerts": [{"rule_id": "b"}]}]
+    # Without ALERT_WEBHOOK_URL only the in-process queue is registered
+    assert server.ALERT_WEBHOOK_URL or not any(isinstance(sink, server.WebhookAlertSink) for sink in server.alert_evaluator.sinks)
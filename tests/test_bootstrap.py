@@ -0,0 +1,67 @@
+import asyncio
+from collections import OrderedDict
+
+import httpx
+import orjson
+import pytest
+
+import server
+
+
+def snapshot(version, offset=0.0):
+    table = asyncio.run(server.get_source_one_prices())
+    table.rows["min_price"] += offset
+    return server.PriceSnapshot(version=version, created_at=server.datetime.now(), table=table)
+
+
+@pytest.fixture
+def publish(monkeypatch):
+    """Make a snapshot current the way publish_snapshot does, without the app's other listeners"""
+    monkeypatch.setattr(server, "catalog_facets", server.CatalogFacets())
+    monkeypatch.setattr(server.response_cache, "_entries", OrderedDict())
+
+    def publish(snapshot):
+        monkeypatch.setattr(server, "_snapshot", snapshot)
+        server.catalog_facets.apply(snapshot)
+        server.warm_response_cache(snapshot)
+
+    return publish
+
+
+def get(path, headers=None):
+    async def run():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, headers=headers)
+
+    return asyncio.run(run())
+
+
+def test_bootstrap_carries_the_current_snapshot(publish):
+    current = snapshot(3)
+    publish(current)
+    response = get("/api/bootstrap", {"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["version"] == 3
+    assert body["prices"] == orjson.loads(orjson.dumps(current.table.records()))
+    assert body["locations"] == sorted(set(current.table.location_names()))
+    assert body["polymer_types"] == sorted({product.split()[0] for product in current.table.product_names()})
+    assert body["favorites"] == server.DEFAULT_FAVORITES
+
+
+def test_bootstrap_is_revalidated_per_snapshot(publish):
+    publish(snapshot(1))
+    first = get("/api/bootstrap", {"Accept-Encoding": "gzip"})
+    assert first.headers["content-encoding"] == "gzip" and first.headers["vary"] == "Accept-Encoding"
+    # The body warmed at publish time is served as is
+    assert first.content == server.response_cache.get("bootstrap", 1, lambda: None).identity
+
+    etag = first.headers["etag"]
+    assert get("/api/bootstrap", {"If-None-Match": etag}).status_code == 304
+
+    publish(snapshot(2, offset=1))
+    second = get("/api/bootstrap", {"If-None-Match": etag})
+    assert second.status_code == 200 and second.headers["etag"] != etag
+    assert second.json()["version"] == 2
+    assert second.json()["prices"][0]["min_price"] == first.json()["prices"][0]["min_price"] + 1
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import server
+
+
+def snapshot(version, rows):
+    """rows: {(product, location): (min_price, max_price)}"""
+    keys = list(rows)
+    return server.PriceSnapshot(version=version, created_at=datetime(2024, 1, 1), table=server.PriceTable.from_columns(
+        products=[product for product, _ in keys],
+        locations=[location for _, location in keys],
+        transit_times=["1 DAY"] * len(keys),
+        min_prices=[low for low, _ in rows.values()],
+        max_prices=[high for _, high in rows.values()],
+        price_changes=[0.0] * len(keys),
+        last_updated=datetime(2024, 1, 1),
+    ))
+
+
+def rebuilt(snapshot):
+    facets = server.CatalogFacets()
+    facets.apply(snapshot)
+    return facets.view()
+
+
+BASE = {
+    ("HD FILM", "Mumbai"): (90.0, 95.0),
+    ("HD FILM", "Delhi"): (91.0, 97.0),
+    ("HD GPBM", "Mumbai"): (88.0, 92.0),
+    ("PP RAFFIA", "Delhi"): (93.0, 95.0),
+    ("PVC K67", "Chennai"): (70.0, 74.0),
+}
+
+
+def steps():
+    rows = dict(BASE)
+    yield "seed", rows
+
+    rows = dict(rows)
+    rows[("HD GPBM", "Mumbai")] = (80.0, 99.0)
+    yield "price moves widen the grade, family and location bounds", rows
+
+    rows = dict(rows)
+    del rows[("HD FILM", "Delhi")]
+    yield "a row goes, its grade stays", rows
+
+    rows = dict(rows)
+    rows[("ABS GP", "Pune")] = (150.0, 160.0)
+    yield "new family and new location", rows
+
+    rows = dict(rows)
+    del rows[("PVC K67", "Chennai")]
+    yield "last row of a family and of a location goes", rows
+
+    rows = dict(rows)
+    del rows[("PP RAFFIA", "Delhi")]
+    rows[("PP RAFFIA", "Chennai")] = (94.0, 96.0)
+    yield "grade moves to a location that had gone", rows
+
+
+def test_incremental_updates_match_a_rebuild():
+    facets = server.CatalogFacets()
+    for version, (step, rows) in enumerate(steps(), start=1):
+        current = snapshot(version, rows)
+        facets.apply(current)
+        assert facets.view() == rebuilt(current), step
+
+
+def test_unchanged_snapshot_keeps_the_serialised_view():
+    facets = server.CatalogFacets()
+    facets.apply(snapshot(1, BASE))
+    view = facets.view()
+    facets.apply(snapshot(2, dict(BASE)))
+    assert facets.view()["version"] == 2
+    assert facets.view()["families"] is view["families"]
+
+    moved = dict(BASE)
+    moved[("PVC K67", "Chennai")] = (71.0, 74.0)
+    facets.apply(snapshot(3, moved))
+    assert facets.view()["families"] is not view["families"]
+    (pvc,) = [family for family in facets.view()["families"] if family["family"] == "PVC"]
+    assert (pvc["count"], pvc["min_price"], pvc["max_price"]) == (1, 71.0, 74.0)
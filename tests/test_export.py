@@ -0,0 +1,72 @@
+import asyncio
+import csv
+import io
+
+import numpy as np
+import orjson
+import pytest
+
+import server
+
+DAY = 86400
+START = 1_700_000_000
+
+
+@pytest.fixture
+def history():
+    store = server.PriceHistoryStore()
+    for day in range(5):
+        table = asyncio.run(server.get_source_one_prices())
+        table.rows["min_price"] += day
+        snapshot = server.PriceSnapshot(version=day + 1, created_at=server.datetime.fromtimestamp(START + day * DAY),
+                                        table=table)
+        store.append_snapshot(snapshot)
+    return store
+
+
+def test_history_chunks_are_bounded_and_complete(history, monkeypatch):
+    monkeypatch.setattr(server, "EXPORT_CHUNK_ROWS", 7)
+    chunks = list(server.export_history(history, None, None, None, None))
+    assert all(len(chunk["timestamp"]) <= 7 for chunk in chunks)
+
+    lines = b"".join(server.encode_ndjson(server.EXPORT_SCHEMAS["history"], iter(chunks))).splitlines()
+    rows = [orjson.loads(line) for line in lines]
+    assert len(rows) == 31 * 5
+    film = [row for row in rows if row["product"] == "HD FILM"]
+    ts, mins, maxs = history.query("HD FILM")
+    assert [row["min_price"] for row in film] == mins.tolist()
+    assert film[0]["price"] == (mins[0] + maxs[0]) / 2
+
+
+def test_history_filters(history):
+    start = server.datetime.fromtimestamp(START + 2 * DAY)
+    chunks = server.export_history(history, "HD FILM", None, start, None)
+    body = b"".join(server.encode_csv(server.EXPORT_SCHEMAS["history"], chunks)).decode()
+    header, *rows = list(csv.reader(io.StringIO(body)))
+    assert header[:3] == ["product", "location", "timestamp"]
+    assert len(rows) == 3 and {row[0] for row in rows} == {"HD FILM"}
+
+
+def test_parquet_streams_one_row_group_per_chunk(history, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(server, "EXPORT_CHUNK_ROWS", 50)
+    chunks = server.export_history(history, None, None, None, None)
+    parts = list(server.encode_parquet(server.EXPORT_SCHEMAS["history"], chunks))
+    assert len(parts) > 2
+    parquet = pq.ParquetFile(io.BytesIO(b"".join(parts)))
+    assert parquet.metadata.num_rows == 31 * 5
+    assert parquet.num_row_groups == 4
+    table = parquet.read()
+    assert np.allclose(table["price"].to_numpy(), (table["min_price"].to_numpy() + table["max_price"].to_numpy()) / 2)
+
+
+def test_naive_from_is_ist_wall_clock(history, monkeypatch):
+    monkeypatch.setattr(server, "price_history_store", history)
+
+    async def run():
+        # START + 2 days, written as IST wall-clock time
+        response = await server.export_data(dataset="history", format="ndjson", product="HD FILM", location=None,
+                                            from_=server.datetime(2023, 11, 17, 3, 43, 20), to=None)
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    assert len(asyncio.run(run()).splitlines()) == 3
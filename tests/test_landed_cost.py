@@ -0,0 +1,70 @@
+import math
+from datetime import datetime
+
+import numpy as np
+
+import server
+
+
+def synthetic_table(size=600):
+    rng = np.random.default_rng(0)
+    min_prices = np.round(rng.uniform(70, 160, size), 2)
+    return server.PriceTable.from_columns(
+        products=[f"GRADE {i % 37}" for i in range(size)],
+        locations=[(server.LOCATIONS + ["Surat"])[i % 11] for i in range(size)],
+        transit_times=[["1 DAY", "2 DAYS", "1-3 DAYS", "48 HRS"][i % 4] for i in range(size)],
+        min_prices=min_prices,
+        max_prices=np.round(min_prices + rng.uniform(1, 30, size), 2),
+        price_changes=np.zeros(size),
+        last_updated=datetime(2024, 1, 1),
+    )
+
+
+def test_parse_transit_days():
+    assert server.parse_transit_days("1 DAY") == 1
+    assert server.parse_transit_days("2 DAYS") == 2
+    assert server.parse_transit_days("1-3 days") == 3
+    assert server.parse_transit_days("48 HRS") == 2
+    assert server.parse_transit_days("1 WEEK") == 7
+    assert math.isnan(server.parse_transit_days("on request"))
+
+
+def test_matrix_matches_brute_force():
+    table = synthetic_table()
+    freight = server.FreightTable(server.LOCATIONS, {"Mumbai": {"Pune": 0.1}}, {"Delhi": 0.12})
+    matrix = server.LandedCostMatrix(table, freight)
+    km = freight.road_km(table.locations.values)
+    fares, road_days = freight.matrices(table.locations.values)
+    assert fares[table.locations.codes["Mumbai"], server.LOCATIONS.index("Pune")] == 0.1
+
+    records = table.records()
+    for p, product in enumerate(matrix.products):
+        for d, destination in enumerate(server.LOCATIONS):
+            best = None
+            for record in records:
+                if record["product"] != product:
+                    continue
+                origin = table.locations.codes[record["location"]]
+                if math.isnan(km[origin, d]):
+                    continue  # Surat has no freight rate
+                tax = 0.12 if destination == "Delhi" else 0.18
+                cost = ((record["min_price"] + record["max_price"]) / 2 + fares[origin, d]) * (1 + tax)
+                if best is None or cost < best[0]:
+                    best = (cost, record, origin)
+            cost, record, origin = best
+            assert math.isclose(matrix.landed_price[p, d], cost)
+            assert matrix.origins[p, d] == record["location"]
+            transit = server.parse_transit_days(record["transit_time"]) + road_days[origin, d]
+            assert matrix.transit_days[p, d] == transit
+
+
+def test_unpriced_cells_are_null():
+    table = server.PriceTable.from_columns(
+        products=["GRADE"], locations=["Surat"], transit_times=["1 DAY"],
+        min_prices=np.array([100.0]), max_prices=np.array([110.0]), price_changes=np.zeros(1),
+        last_updated=datetime(2024, 1, 1),
+    )
+    matrix = server.LandedCostMatrix(table, server.FreightTable(server.LOCATIONS))
+    entry, = matrix.entries("GRADE", "Delhi")
+    assert entry["origin"] is None and entry["landed_price"] is None
+    assert matrix.grid()["origins"] == [[None] * len(server.LOCATIONS)]
@@ -0,0 +1,72 @@
+import asyncio
+import os
+
+import server
+
+
+def http_scope(path, method="GET", headers=()):
+    return {"type": "http", "method": method, "path": path, "root_path": "", "query_string": b"",
+            "headers": list(headers)}
+
+
+async def call(middleware, scope):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware(scope, receive, send)
+    return sent[0]["status"]
+
+
+def slow_app(seen):
+    async def app(scope, receive, send):
+        seen.append(dict(server.REQUESTS_IN_FLIGHT.values))
+        await asyncio.sleep(0.05)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+    return app
+
+
+def test_in_flight_requests_are_counted_per_route():
+    seen = []
+    middleware = server.MetricsMiddleware(slow_app(seen))
+    route = "/api/price-history/{product_name}"
+
+    async def run():
+        await asyncio.gather(call(middleware, http_scope("/api/prices")),
+                             call(middleware, http_scope("/api/price-history/HD FILM")))
+
+    asyncio.run(run())
+    assert seen[-1][("/api/prices",)] == 1
+    assert seen[-1][(route,)] == 1
+    assert server.REQUESTS_IN_FLIGHT.values[("/api/prices",)] == 0
+    assert server.REQUESTS_IN_FLIGHT.values[(route,)] == 0
+
+
+def test_overlapping_requests_are_profiled_one_at_a_time(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(server, "PROFILE_SAMPLE_RATE", 1.0)
+    middleware = server.MetricsMiddleware(slow_app([]))
+
+    async def run():
+        return await asyncio.gather(*(call(middleware, http_scope("/healthz")) for _ in range(3)))
+
+    assert asyncio.run(run()) == [200, 200, 200]
+    assert len(os.listdir(tmp_path)) == 1
+    # Once the profiled request is done, the next one can be profiled
+    assert asyncio.run(run()) == [200, 200, 200]
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_route_templates_are_matched_once_per_path():
+    server._match_route_template.cache_clear()
+    for _ in range(3):
+        assert server._route_template(http_scope("/api/price-history/PP RAFFIA")) == "/api/price-history/{product_name}"
+    assert server._route_template(http_scope("/api/price-history/PP RAFFIA", method="POST")) == "unmatched"
+    assert server._route_template(http_scope("/no/such/route")) == "unmatched"
+    info = server._match_route_template.cache_info()
+    assert (info.hits, info.misses) == (2, 3)
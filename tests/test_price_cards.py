@@ -0,0 +1,42 @@
+import pytest
+
+import server
+
+
+def comparable(table):
+    return [(r["product"], r["min_price"], r["max_price"], r["transit_time"]) for r in table.records()]
+
+
+@pytest.mark.anyio
+async def test_fixture_yields_the_stored_price_list(source_one_page):
+    rows = server.extract_price_cards(source_one_page)
+    stored = await server.get_source_one_prices()
+    assert len(rows) == 31
+    assert rows[0] == {"product": "HD GPBM", "price_range": "₹89 - ₹92.75", "transit_time": "1 DAY"}
+    assert comparable(server.build_price_table(rows)) == comparable(stored)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 4096])
+def test_chunk_boundaries_do_not_change_the_rows(source_one_page, chunk_size):
+    extractor = server.PriceCardExtractor()
+    for offset in range(0, len(source_one_page), chunk_size):
+        extractor.feed(source_one_page[offset:offset + chunk_size])
+    assert extractor.close() == server.extract_price_cards(source_one_page)
+
+
+def test_nested_cards_match_once_at_the_enclosing_card():
+    html = """
+    <html><body>
+      <div class="price-card">
+        <div class="card-header"><h5>PP RAFFIA</h5></div>
+        <div class="price-info"><span>₹93.85 - ₹95.3</span></div>
+        <div class="transit-badge">2 DAYS</div>
+      </div>
+      <div class="card"><div class="card-body">Market news, no price</div></div>
+      <div class="price-card"><div class="price-info">HD FILM ₹91.2 - ₹103.25 1 DAY</div></div>
+    </body></html>
+    """.encode("utf-8")
+    assert server.extract_price_cards(html) == [
+        {"product": "PP RAFFIA", "price_range": "₹93.85 - ₹95.3", "transit_time": "2 DAYS"},
+        {"product": "HD FILM", "price_range": "₹91.2 - ₹103.25", "transit_time": "1 DAY"},
+    ]
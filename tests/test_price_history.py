@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+import server
+
+# 2024-01-01 00:00 IST (Monday) is 2023-12-31 18:30 UTC
+IST_MIDNIGHT = 1704047400
+
+
+def candles(ts, interval):
+    ts = np.array(ts, dtype=np.int64)
+    prices = np.arange(len(ts), dtype=float) + 100
+    return server.downsample_ohlc(ts, prices, prices, interval)
+
+
+def test_daily_candles_run_from_ist_midnight():
+    points = [IST_MIDNIGHT - 60, IST_MIDNIGHT + 60, IST_MIDNIGHT + 86400 - 60]
+    before, today = candles(points, "1d")
+    assert before["count"] == 1 and today["count"] == 2
+    assert today["date"] == datetime(2024, 1, 1, tzinfo=server.MARKET_TZ)
+    assert today["date"].utcoffset() == timedelta(hours=5, minutes=30)
+
+
+def test_weekly_candles_start_on_monday_ist_and_hours_on_the_ist_hour():
+    sunday_night, monday_morning = IST_MIDNIGHT - 60, IST_MIDNIGHT + 60
+    last_week, this_week = candles([sunday_night, monday_morning], "1w")
+    assert this_week["date"] == datetime(2024, 1, 1, tzinfo=server.MARKET_TZ)
+    assert last_week["date"] == datetime(2023, 12, 25, tzinfo=server.MARKET_TZ)
+
+    (hour,) = candles([IST_MIDNIGHT + 3600 + 10, IST_MIDNIGHT + 2 * 3600 - 10], "1h")
+    assert hour["date"] == datetime(2024, 1, 1, 1, tzinfo=server.MARKET_TZ)
+
+
+def test_statistics_days_match_candle_days():
+    assert server.market_day(IST_MIDNIGHT - 1) + 1 == server.market_day(IST_MIDNIGHT)
+    assert server.market_day(IST_MIDNIGHT) == server.market_day(IST_MIDNIGHT + 86399)
+
+
+def test_torn_tail_is_dropped_before_the_next_append(tmp_path):
+    table = server.build_price_table([
+        {"product": "HD FILM", "price_range": "₹91.2 - ₹103.25", "transit_time": "1 DAY"},
+        {"product": "PP RAFFIA", "price_range": "₹93.85 - ₹95.3", "transit_time": "2 DAYS"},
+    ])
+    store = server.PriceHistoryStore(str(tmp_path))
+    store.append_snapshot(server.PriceSnapshot(version=1, created_at=datetime.fromtimestamp(IST_MIDNIGHT), table=table))
+    # A crash part-way through the next append
+    with open(tmp_path / "history.bin", "ab") as f:
+        f.write(b"\0" * 10)
+    assert len(server.PriceHistoryStore(str(tmp_path)).query("HD FILM")[0]) == 1
+
+    store = server.PriceHistoryStore(str(tmp_path))
+    store.append_snapshot(server.PriceSnapshot(version=2, created_at=datetime.fromtimestamp(IST_MIDNIGHT + 60),
+                                               table=table))
+    assert (tmp_path / "history.bin").stat().st_size == 4 * server.HISTORY_RECORD.itemsize
+    reloaded = server.PriceHistoryStore(str(tmp_path))
+    for product in ("HD FILM", "PP RAFFIA"):
+        ts, mins, _ = reloaded.query(product)
+        assert ts.tolist() == [IST_MIDNIGHT, IST_MIDNIGHT + 60]
+        np.testing.assert_array_equal(mins, store.query(product)[1])
+
+
+def test_naive_bounds_are_ist_wall_clock(tmp_path, monkeypatch):
+    table = server.build_price_table([
+        {"product": "HD FILM", "price_range": "₹91.2 - ₹103.25", "transit_time": "1 DAY"},
+    ])
+    store = server.PriceHistoryStore(str(tmp_path))
+    for version, ts in enumerate([IST_MIDNIGHT - 60, IST_MIDNIGHT + 60, IST_MIDNIGHT + 86400 + 60], start=1):
+        store.append_snapshot(server.PriceSnapshot(version=version, created_at=datetime.fromtimestamp(ts), table=table))
+    monkeypatch.setattr(server, "price_history_store", store)
+
+    result = asyncio.run(server.get_price_history("HD FILM", location=None, from_=datetime(2024, 1, 1),
+                                                  to=datetime(2024, 1, 1, 23, 59), interval=None))
+    assert [point["date"] for point in result["history"]] == [datetime.fromtimestamp(IST_MIDNIGHT + 60,
+                                                                                      server.MARKET_TZ)]
+    # Explicit offsets are left alone
+    utc_midnight = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    result = asyncio.run(server.get_price_history("HD FILM", location=None, from_=utc_midnight, to=None,
+                                                  interval=None))
+    assert len(result["history"]) == 1
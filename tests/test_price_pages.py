@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import numpy as np
+
+import server
+
+
+def snapshot_of(keys, version=1):
+    size = len(keys)
+    table = server.PriceTable.from_columns(
+        products=[product for product, _ in keys],
+        locations=[location for _, location in keys],
+        transit_times=["1 DAY"] * size,
+        min_prices=np.arange(size, dtype=float) + 100,
+        max_prices=np.arange(size, dtype=float) + 110,
+        price_changes=np.zeros(size),
+        last_updated=datetime(2024, 1, 1),
+    )
+    return server.PriceSnapshot(version=version, created_at=datetime(2024, 1, 1), table=table)
+
+
+def read_pages(snapshots, limit):
+    """Walk the pages, taking each one from the next snapshot in the list"""
+    keys, cursor = [], None
+    for snapshot in snapshots:
+        start, end, cursor = server.price_page(snapshot, limit, cursor)
+        page = server.serialize_price_page(snapshot, start, end, ("product", "location"), "json")
+        keys += [(row["product"], row["location"]) for row in page]
+        if cursor is None:
+            break
+    return keys, cursor
+
+
+def test_projection_matches_full_records():
+    snapshot = snapshot_of([("PP RAFFIA", "Delhi"), ("HD FILM", "Pune"), ("HD FILM", "Delhi")])
+    order, _ = snapshot.key_order
+    records = snapshot.table.records(order)
+    assert server.serialize_price_page(snapshot, 0, 3, server.PRICE_FIELDS, "json") == records
+
+    compact = server.serialize_price_page(snapshot, 0, 2, ("product", "price_range"), "compact")
+    assert compact[0] == ["product", "price_range"]
+    assert [list(row) for row in compact[1:]] == [[r["product"], r["price_range"]] for r in records[:2]]
+
+
+def test_pages_are_stable_across_refreshes():
+    grades = [f"GRADE {i:02d}" for i in range(20)]
+    before = [(grade, "Mumbai") for grade in grades]
+    # Between pages a refresh adds rows on both sides of the cursor and drops one ahead of it
+    after = [key for key in before if key != ("GRADE 12", "Mumbai")] + [("GRADE 01", "Pune"), ("GRADE 15", "Pune")]
+
+    keys, cursor = read_pages([snapshot_of(before), snapshot_of(after, version=2)] + [snapshot_of(after, 2)] * 5, 8)
+    assert cursor is None
+    assert len(keys) == len(set(keys))
+    assert keys == sorted(keys)
+    assert keys[:8] == sorted(before)[:8]
+    assert ("GRADE 15", "Pune") in keys and ("GRADE 12", "Mumbai") not in keys
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    key = ("EVA >=22% VA", "Pune")
+    assert server.decode_price_cursor(server.encode_price_cursor(key)) == key
+    for cursor in ["!!", "abc", server.encode_price_cursor(("only one",))]:
+        try:
+            server.decode_price_cursor(cursor)
+        except ValueError:
+            continue
+        raise AssertionError(f"{cursor} was accepted")
+
+
+def test_pages_are_cached_apart_and_compressed_on_demand(monkeypatch):
+    monkeypatch.setattr(server, "price_page_cache", server.ResponseCache(4, precompress=False))
+    snapshot = snapshot_of([(f"GRADE {i:02d}", "Pune") for i in range(10)])
+    warmed = dict(server.response_cache._entries)
+    for start in range(10):
+        server.price_page_cache.get(f"prices-page:json:product:{start}:{start + 1}", snapshot.version,
+                                    lambda: server.serialize_price_page(snapshot, start, start + 1, ("product",), "json"))
+    assert dict(server.response_cache._entries) == warmed
+    assert len(server.price_page_cache._entries) == 4
+
+    entry = next(iter(server.price_page_cache._entries.values()))
+    assert entry._encoded == {}
+    assert server.gzip.decompress(entry.encoded("gzip")) == entry.identity
+    assert list(entry._encoded) == ["gzip"]
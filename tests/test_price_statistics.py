@@ -0,0 +1,57 @@
+import asyncio
+
+import numpy as np
+
+import server
+
+DAY = 86400
+START = 1_700_000_000 // DAY * DAY
+
+
+def shifted_table(offset: float):
+    table = asyncio.run(server.get_source_one_prices())
+    table.rows["min_price"] += offset
+    table.rows["max_price"] += offset
+    return table
+
+
+def test_change_is_measured_on_midpoint_and_carried_while_price_holds():
+    stats = server.PriceStatistics()
+    first = shifted_table(0)
+    stats.update(first, START)
+    assert not first.price_changes.any()
+
+    second = shifted_table(2)
+    stats.update(second, START + 60)
+    mid = (first.min_prices + first.max_prices) / 2
+    np.testing.assert_allclose(second.price_changes, 2)
+    np.testing.assert_allclose(second.price_change_percents, 2 / mid * 100)
+    assert second.records([0])[0]["price_change_percent"] == f"{2 / mid[0] * 100:+.2f}%"
+
+    # An unchanged price keeps reporting its last move
+    third = shifted_table(2)
+    stats.update(third, START + 120)
+    np.testing.assert_allclose(third.price_changes, 2)
+
+
+def test_rolling_windows_match_brute_force():
+    stats = server.PriceStatistics()
+    rng = np.random.default_rng(0)
+    offsets = rng.uniform(-5, 5, 45)
+    for day, offset in enumerate(offsets):
+        # Two snapshots a day; only the later one is the daily close
+        stats.update(shifted_table(offset + 1), START + day * DAY + 3600)
+        stats.update(shifted_table(offset), START + day * DAY + 7200)
+
+    (row,) = stats.summary("HD FILM")
+    closes = (91.2 + 103.25) / 2 + offsets
+    for window in server.STATS_WINDOWS:
+        recent = closes[-window:]
+        # One daily change per day in the window
+        returns = closes[-window:] / closes[-window - 1:-1] - 1
+        summary = row[f"{window}d"]
+        assert summary["days"] == window
+        assert summary["moving_average"] == round(recent.mean(), 4)
+        assert summary["min"] == round(recent.min(), 4)
+        assert summary["max"] == round(recent.max(), 4)
+        assert summary["volatility"] == round(returns.std() * 100, 4)
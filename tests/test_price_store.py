@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+import server  # noqa: E402
+
+
+def make_store():
+    return server.PriceStore(mongomock_motor.AsyncMongoMockClient()["polymer_pricing_test"])
+
+
+def test_save_snapshot_upserts_by_product_and_location():
+    async def run():
+        store = make_store()
+        await store.ensure_indexes()
+        first = server.PriceSnapshot(version=1, created_at=server.datetime.now(),
+                                     table=await server.get_source_one_prices())
+        second = server.PriceSnapshot(version=2, created_at=server.datetime.now(),
+                                      table=first.table)
+        await store.save_snapshot(first)
+        await store.save_snapshot(second)
+        return store, first
+
+    store, first = asyncio.run(run())
+    docs = asyncio.run(store.prices.find({}).to_list(None))
+    assert len(docs) == len(first.table)
+    assert {doc["snapshot_version"] for doc in docs} == {2}
+
+
+def test_find_prices_is_projection_limited():
+    async def run():
+        store = make_store()
+        snapshot = server.PriceSnapshot(version=1, created_at=server.datetime.now(),
+                                        table=await server.get_source_one_prices())
+        await store.save_snapshot(snapshot)
+        rows = await store.find_prices(product="HD FILM", fields=["product", "min_price"]).to_list(None)
+        models = await store.load_prices(product="HD FILM")
+        return rows, models
+
+    rows, models = asyncio.run(run())
+    assert rows == [{"product": "HD FILM", "min_price": 91.2}]
+    assert [m.product for m in models] == ["HD FILM"]
+
+
+def test_unreachable_server_leaves_store_unset(monkeypatch):
+    monkeypatch.setattr(server, "MONGO_URL", "mongodb://127.0.0.1:1")
+    monkeypatch.setattr(server, "MONGO_TIMEOUT_MS", 100)
+    for name in ("client", "db", "price_store", "alert_rule_store"):
+        monkeypatch.setattr(server, name, None)
+    asyncio.run(server.open_price_store())
+    assert server.price_store is None and server.alert_rule_store is None and server.client is None
+
+
+def test_first_snapshot_is_seeded_from_the_last_stored_prices(monkeypatch):
+    async def run():
+        store = make_store()
+        stored = await server.get_source_one_prices()
+        stored.rows["min_price"] += 5
+        stored.rows["max_price"] += 5
+        stored.rows["price_change"] = 1.5
+        await store.save_snapshot(server.PriceSnapshot(version=3, created_at=server.datetime.now(), table=stored))
+        monkeypatch.setattr(server, "price_store", store)
+        return stored, await server.load_seed_table()
+
+    stored, seed = asyncio.run(run())
+
+    def rows(table):
+        # BSON keeps milliseconds
+        return sorted(({**record, "last_updated": record["last_updated"].replace(microsecond=0)}
+                       for record in table.records()), key=lambda record: record["id"])
+
+    assert rows(seed) == rows(stored)
+
+
+def test_seed_falls_back_to_the_built_in_list(monkeypatch):
+    async def never_opens():
+        await asyncio.sleep(10)
+
+    async def run():
+        monkeypatch.setattr(server, "price_store", None)
+        monkeypatch.setattr(server, "MONGO_SEED_WAIT_SECONDS", 0.05)
+        monkeypatch.setattr(server, "_price_store_task", asyncio.create_task(never_opens()))
+        seed = await server.load_seed_table()
+        server._price_store_task.cancel()
+        return seed
+
+    seed = asyncio.run(run())
+    assert seed.product_names() == asyncio.run(server.get_source_one_prices()).product_names()
+
+
+def test_from_prices_round_trips_the_records():
+    table = asyncio.run(server.get_source_one_prices())
+    rebuilt = server.PriceTable.from_prices([server.PolymerPrice(**r) for r in table.records()])
+    assert rebuilt.records() == table.records()
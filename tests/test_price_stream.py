@@ -0,0 +1,61 @@
+import asyncio
+
+import orjson
+
+import server
+
+
+def snapshot(version, offset=0.0):
+    table = asyncio.run(server.get_source_one_prices())
+    table.rows["min_price"] += offset
+    return server.PriceSnapshot(version=version, created_at=server.datetime.now(), table=table)
+
+
+def frames(queue):
+    events = []
+    while not queue.empty():
+        head, data = queue.get_nowait().decode("utf-8").rsplit("data: ", 1)
+        events.append((head.split("event: ")[1].strip(), orjson.loads(data)))
+    return events
+
+
+def test_diff_reports_changed_and_removed_rows():
+    broadcaster = server.PriceBroadcaster(8)
+    first = broadcaster.diff(snapshot(1))
+    assert first["base_version"] == 0 and len(first["upserts"]) == 31
+
+    moved = snapshot(2)
+    row = moved.table.product_names().index("PP RAFFIA")
+    moved.table.rows["min_price"][row] += 1
+    keep = [i for i in range(len(moved.table)) if i != 0]
+    dropped = moved.table.keys()[0]
+    moved = server.PriceSnapshot(version=2, created_at=moved.created_at, table=server.PriceTable(
+        moved.table.rows[keep], moved.table.products, moved.table.locations,
+        moved.table.transits, moved.table.currencies))
+    delta = broadcaster.diff(moved)
+    assert delta["base_version"] == 1 and delta["version"] == 2
+    assert [price["product"] for price in delta["upserts"]] == ["PP RAFFIA"]
+    assert delta["removed"] == [list(dropped)]
+
+
+def test_every_version_is_chained_even_without_changes():
+    broadcaster = server.PriceBroadcaster(8)
+    broadcaster.publish(snapshot(1))
+    queue = broadcaster.subscribe()
+    broadcaster.publish(snapshot(2))
+    broadcaster.publish(snapshot(3, offset=1))
+    (_, unchanged), (_, changed) = frames(queue)
+    assert (unchanged["base_version"], unchanged["version"]) == (1, 2)
+    assert unchanged["upserts"] == [] and unchanged["removed"] == []
+    assert (changed["base_version"], changed["version"]) == (2, 3)
+    assert len(changed["upserts"]) == 31
+
+
+def test_slow_subscriber_gets_one_resync():
+    broadcaster = server.PriceBroadcaster(2)
+    queue = broadcaster.subscribe()
+    for version in range(1, 5):
+        broadcaster.publish(snapshot(version, offset=version))
+    events = frames(queue)
+    assert events[0] == ("resync", {"version": 3})
+    assert events[-1][0] == "delta" and events[-1][1]["version"] == 4
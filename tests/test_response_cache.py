@@ -0,0 +1,83 @@
+import gzip
+
+import orjson
+from starlette.requests import Request
+
+import server
+
+PAYLOAD = {"prices": [{"product": "HD FILM", "min_price": 91.2}] * 50}
+
+
+def request(**headers):
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"",
+                    "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]})
+
+
+def respond(cache, version=1, **headers):
+    return server.cached_json_response(request(**headers), "prices", version, lambda: PAYLOAD, cache=cache)
+
+
+def test_etag_and_if_none_match():
+    cache = server.ResponseCache(4)
+    first = respond(cache)
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and orjson.loads(first.body) == PAYLOAD
+
+    for if_none_match in (etag, f'"other", {etag}', "*"):
+        not_modified = respond(cache, if_none_match=if_none_match)
+        assert not_modified.status_code == 304 and not_modified.body == b""
+        assert not_modified.headers["etag"] == etag and not_modified.headers["vary"] == "Accept-Encoding"
+
+    assert respond(cache, if_none_match='"other"').status_code == 200
+    # A new snapshot version is a new representation
+    assert respond(cache, version=2, if_none_match=etag).status_code == 200
+
+
+def test_content_encoding_negotiation(monkeypatch):
+    cache = server.ResponseCache(4)
+    identity = orjson.dumps(PAYLOAD)
+
+    plain = respond(cache)
+    assert "content-encoding" not in plain.headers and plain.body == identity
+    assert plain.headers["vary"] == "Accept-Encoding"
+
+    gzipped = respond(cache, accept_encoding="gzip, deflate")
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(gzipped.body) == identity
+
+    assert "content-encoding" not in respond(cache, accept_encoding="gzip;q=0").headers
+    assert respond(cache, accept_encoding="br;q=0, gzip").headers["content-encoding"] == "gzip"
+
+    both = respond(cache, accept_encoding="gzip, br")
+    if server.brotli is not None:
+        assert both.headers["content-encoding"] == "br"
+        assert server.brotli.decompress(both.body) == identity
+    else:
+        assert both.headers["content-encoding"] == "gzip"
+
+    # Without the brotli module br is never offered
+    monkeypatch.setattr(server, "brotli", None)
+    assert respond(cache, accept_encoding="br").body == identity
+
+
+def test_bodies_are_built_and_compressed_once_per_version():
+    builds = []
+
+    def build():
+        builds.append(1)
+        return PAYLOAD
+
+    lazy = server.ResponseCache(2, precompress=False)
+    entry = lazy.get("prices", 1, build)
+    assert entry._encoded == {}
+    assert lazy.get("prices", 1, build).encoded("gzip") is entry.encoded("gzip")
+    assert list(entry._encoded) == ["gzip"] and len(builds) == 1
+
+    eager = server.ResponseCache(2)
+    assert set(eager.get("prices", 1, build)._encoded) == {"gzip", "br"}
+
+    # Least recently used entries are evicted past maxsize
+    lazy.get("prices", 2, build)
+    lazy.get("prices", 3, build)
+    lazy.get("prices", 1, build)
+    assert len(builds) == 5
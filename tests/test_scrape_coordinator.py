@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import server
+
+ETAG = '"fixture"'
+LAST_MODIFIED = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+class Upstream:
+    """MockTransport handler serving the synthetic page, with validators and a delay"""
+
+    def __init__(self, page, delay=0.05):
+        self.page = page
+        self.delay = delay
+        self.requests = []
+
+    async def __call__(self, request):
+        self.requests.append(request)
+        await asyncio.sleep(self.delay)
+        if request.headers.get("If-None-Match") == ETAG or request.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            return httpx.Response(304)
+        return httpx.Response(200, content=self.page, headers={
+            "Content-Type": "text/html; charset=utf-8", "ETag": ETAG, "Last-Modified": LAST_MODIFIED,
+        })
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Snapshots published by the coordinator, without touching the app's listeners"""
+    snapshots = []
+
+    def publish(table, **kwargs):
+        snapshot = server.PriceSnapshot(version=len(snapshots) + 1, created_at=server.datetime.now(), table=table)
+        snapshots.append(snapshot)
+        monkeypatch.setattr(server, "_snapshot", snapshot)
+        return snapshot
+
+    monkeypatch.setattr(server, "_snapshot", None)
+    monkeypatch.setattr(server, "publish_snapshot", publish)
+    return snapshots
+
+
+@pytest.fixture
+async def make_coordinator():
+    """Coordinators fetching from an Upstream handler; closed after the test"""
+    coordinators = []
+
+    def make(upstream, min_interval=60.0, stale_seconds=300.0):
+        coordinator = server.ScrapeCoordinator([server.SourceOnePrices("http://source.test", ["/page"])],
+                                               min_interval, stale_seconds)
+        coordinator._client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+        coordinators.append(coordinator)
+        return coordinator
+
+    yield make
+    for coordinator in coordinators:
+        await coordinator.close()
+
+
+@pytest.mark.anyio
+async def test_concurrent_callers_share_one_fetch(published, make_coordinator, source_one_page):
+    upstream = Upstream(source_one_page)
+    coordinator = make_coordinator(upstream)
+    results = await asyncio.gather(*(coordinator.scrape() for _ in range(10)))
+    assert len(upstream.requests) == 1
+    assert len(published) == 1
+    assert all(snapshot is published[0] for snapshot in results)
+    assert len(published[0].table) == 31
+
+
+@pytest.mark.anyio
+async def test_min_interval_then_stale_while_revalidate(published, make_coordinator, source_one_page):
+    upstream = Upstream(source_one_page)
+    coordinator = make_coordinator(upstream, min_interval=60, stale_seconds=300)
+    first = await coordinator.scrape()
+    # Within the minimum interval the current snapshot is served without a request
+    assert await coordinator.scrape() is first
+    assert len(upstream.requests) == 1
+
+    # Past it but inside the stale window: served at once, revalidated behind it
+    coordinator._last_fetch = time.monotonic() - 61
+    assert await coordinator.scrape() is first
+    assert not coordinator._inflight.done()
+    await coordinator._inflight
+    assert len(upstream.requests) == 2
+
+    # Past the stale window the caller waits for the fetch
+    coordinator._last_fetch = time.monotonic() - 400
+    await coordinator.scrape()
+    assert coordinator._inflight.done()
+    assert len(upstream.requests) == 3
+
+
+@pytest.mark.anyio
+async def test_conditional_get_turns_304_into_the_current_snapshot(published, make_coordinator, source_one_page):
+    upstream = Upstream(source_one_page, delay=0)
+    coordinator = make_coordinator(upstream, min_interval=0, stale_seconds=0)
+    first = await coordinator.scrape()
+    second = await coordinator.scrape()
+    assert "If-None-Match" not in upstream.requests[0].headers
+    assert upstream.requests[1].headers["If-None-Match"] == ETAG
+    assert upstream.requests[1].headers["If-Modified-Since"] == LAST_MODIFIED
+    # The 304 does not publish a new snapshot
+    assert second is first
+    assert len(published) == 1
@@ -0,0 +1,161 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+import server
+
+LATENCY = 0.1
+
+
+class StubSource(BaseHTTPRequestHandler):
+    """Serves the synthetic page on every path, with injected latency and ETags"""
+
+    page = b""
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    failures = {}
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            time.sleep(LATENCY)
+            if cls.failures.get(self.path, 0) > 0:
+                cls.failures[self.path] -= 1
+                self.send_response(503)
+                self.end_headers()
+                return
+            if self.headers.get("If-None-Match") == '"fixture"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(self.page)))
+            self.send_header("ETag", '"fixture"')
+            self.end_headers()
+            self.wfile.write(self.page)
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_url(source_one_page):
+    StubSource.page = source_one_page
+    StubSource.max_in_flight = 0
+    StubSource.failures = {}
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubSource)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_pipeline(client, base_url, pages, concurrency=2):
+    source = server.SourceOnePrices(base_url, pages)
+    return server.ScrapePipeline(client, [source], concurrency=concurrency, host_rate=1000,
+                                 host_burst=100, retries=2, backoff=0.01)
+
+
+@pytest.mark.anyio
+async def test_pages_stream_with_bounded_concurrency(stub_url):
+    pages = [f"/category/{i}" for i in range(6)]
+    async with httpx.AsyncClient() as client:
+        pipeline = make_pipeline(client, stub_url, pages)
+        builder = server.SnapshotBuilder()
+        started = time.monotonic()
+        arrivals = []
+        async for rows, changed in pipeline.run():
+            arrivals.append(time.monotonic() - started)
+            assert changed
+            builder.add(rows)
+
+    assert len(arrivals) == len(pages)
+    assert StubSource.max_in_flight <= 2
+    # The first page is available well before the last one finishes
+    assert arrivals[0] < arrivals[-1] - LATENCY
+    table = builder.build()
+    assert len(table) == 31
+    assert "PP RAFFIA" in table.product_names()
+
+
+@pytest.mark.anyio
+async def test_retries_transient_errors_then_uses_304(stub_url):
+    StubSource.failures = {"/flaky": 2}
+    async with httpx.AsyncClient() as client:
+        pipeline = make_pipeline(client, stub_url, ["/flaky"])
+        first = [page async for page in pipeline.run()]
+        second = [page async for page in pipeline.run()]
+
+    (rows, changed), = first
+    assert changed and len(rows) == 31
+    (cached_rows, cached_changed), = second
+    assert not cached_changed
+    assert cached_rows == rows
+
+
+@pytest.mark.anyio
+async def test_permanent_errors_are_not_retried(source_one_page):
+    requests = []
+    statuses = {"/page": 200}
+
+    def handler(request):
+        requests.append(request.url.path)
+        if statuses[request.url.path] != 200:
+            return httpx.Response(statuses[request.url.path])
+        return httpx.Response(200, content=source_one_page, headers={"Content-Type": "text/html; charset=utf-8"})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        pipeline = make_pipeline(client, "http://source.test", ["/page"])
+        first = [page async for page in pipeline.run()]
+        statuses["/page"] = 404
+        second = [page async for page in pipeline.run()]
+
+    assert requests == ["/page", "/page"]
+    # The 404 falls back to the page's last rows
+    (rows, _), = first
+    assert second == [(rows, False)]
+
+
+@pytest.mark.anyio
+async def test_scheduled_refresh_scrapes_instead_of_reverting_to_stored_prices(stub_url, monkeypatch):
+    live = await server.get_source_one_prices()
+    live.rows["min_price"] += 5
+    published = []
+
+    def publish(table, **kwargs):
+        published.append(table)
+        snapshot = server.PriceSnapshot(version=len(published) + 1, created_at=server.datetime.now(), table=table)
+        monkeypatch.setattr(server, "_snapshot", snapshot)
+        return snapshot
+
+    async def stored_prices():
+        raise AssertionError("the refresher must not rebuild from the stored list")
+
+    monkeypatch.setattr(server, "_snapshot", server.PriceSnapshot(version=1, created_at=server.datetime.now(), table=live))
+    monkeypatch.setattr(server, "publish_snapshot", publish)
+    monkeypatch.setattr(server, "get_source_one_prices", stored_prices)
+    monkeypatch.setattr(server, "SNAPSHOT_REFRESH_SECONDS", 0.01)
+    # The schedule scrapes even inside the on-demand min interval
+    coordinator = server.ScrapeCoordinator([server.SourceOnePrices(stub_url, ["/page"])], 3600, 0)
+    monkeypatch.setattr(server, "scrape_coordinator", coordinator)
+
+    task = asyncio.create_task(server.snapshot_refresher())
+    # First tick scrapes the page, later ticks get 304s and keep the snapshot
+    await asyncio.sleep(1.0)
+    task.cancel()
+    await coordinator.close()
+    assert len(published) == 1
+    assert len(published[0]) == 31
@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pytest
+from fastapi import Response
+
+import server
+
+GRADES = ["HD FILM", "hd film", "LD MOULDING", "PP RAFFIA", "PP RAFFIA 12", "PVC K67", "GRADE 123", "GRADE 1234"]
+SIZE = 400
+
+
+@pytest.fixture(scope="module")
+def table():
+    rng = np.random.default_rng(7)
+    min_prices = np.round(rng.uniform(0, 20, SIZE), 0)
+    min_prices[:5] = 0
+    return server.PriceTable.from_columns(
+        products=[GRADES[i % len(GRADES)] + ("" if i % 3 else f" G{i % 11}") for i in range(SIZE)],
+        locations=[server.LOCATIONS[i % len(server.LOCATIONS)] for i in range(SIZE)],
+        transit_times=["1 DAY" if i % 2 else "2 DAYS" for i in range(SIZE)],
+        min_prices=min_prices,
+        max_prices=min_prices + np.round(rng.uniform(0, 5, SIZE), 0),
+        price_changes=np.round(rng.uniform(-2, 2, SIZE), 1),
+        last_updated=datetime(2024, 1, 1),
+    )
+
+
+def linear_scan(table, q=None, location=None, min_price=None, max_price=None, sort=None):
+    """The reference: check every record against every filter"""
+    rows = []
+    for i, record in enumerate(table.records()):
+        if q and q.upper() not in record["product"].upper():
+            continue
+        if location and record["location"].lower() != location.lower():
+            continue
+        if min_price is not None and record["min_price"] < min_price:
+            continue
+        if max_price is not None and record["max_price"] > max_price:
+            continue
+        rows.append((record, i))
+    if sort:
+        field = sort.lstrip("-")
+        rows.sort(key=lambda pair: (pair[0][field], pair[1]))
+        if sort.startswith("-"):
+            rows.reverse()
+    return [i for _, i in rows]
+
+
+QUERIES = [
+    {"q": "film"},
+    {"q": "HD"},
+    {"q": "GRADE 123"},
+    {"q": "grade 1234"},
+    {"q": "RAFFIA 1"},
+    # Every trigram occurs in some name, but never all in one
+    {"q": "GRADE 12 G"},
+    {"q": "MOULD"},
+    {"q": "NO SUCH GRADE"},
+    {"location": "mumbai"},
+    {"location": "Atlantis"},
+    {"min_price": 0},
+    {"max_price": 0},
+    {"min_price": 5, "max_price": 12},
+    {"q": "PP", "location": "Delhi", "min_price": 3},
+    {"q": "film", "sort": "-min_price"},
+    {"sort": "product"},
+    {"sort": "-location"},
+    {"min_price": 0, "sort": "price_change"},
+]
+
+
+@pytest.mark.parametrize("query", QUERIES, ids=lambda query: "&".join(f"{k}={v}" for k, v in query.items()))
+def test_index_matches_a_linear_scan(table, query):
+    assert server.PriceSearchIndex(table).search(**query).tolist() == linear_scan(table, **query)
+
+
+def test_cursor_pages_stitch_back_to_the_full_result(table, monkeypatch):
+    snapshot = server.PriceSnapshot(version=1, created_at=datetime(2024, 1, 1), table=table)
+
+    async def get_snapshot():
+        return snapshot
+
+    monkeypatch.setattr(server, "get_snapshot", get_snapshot)
+    expected = linear_scan(table, q="pp", sort="-max_price")
+    keys = [tuple(key) for key in np.array(table.keys(), dtype=object)[expected].tolist()]
+
+    async def run():
+        pages, cursor = [], None
+        while True:
+            response = Response()
+            page = await server.search_prices(response, q="pp", location=None, min_price=None, max_price=None,
+                                              sort="-max_price", limit=7, cursor=cursor)
+            assert response.headers["X-Total-Count"] == str(len(expected))
+            pages.append(page)
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                return pages
+
+    pages = asyncio.run(run())
+    assert all(len(page) == 7 for page in pages[:-1]) and 0 < len(pages[-1]) <= 7
+    assert [(price.product, price.location) for page in pages for price in page] == keys
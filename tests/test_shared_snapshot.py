@@ -0,0 +1,58 @@
+import asyncio
+
+import numpy as np
+
+import server
+
+
+def make_snapshot(version: int):
+    table = asyncio.run(server.get_source_one_prices())
+    table.rows["price_change"] = np.arange(len(table))
+    return server.PriceSnapshot(version=version, created_at=server.datetime.now(), table=table)
+
+
+def test_one_refresher_and_zero_copy_reads(tmp_path):
+    refresher = server.SharedSnapshot(str(tmp_path))
+    follower = server.SharedSnapshot(str(tmp_path))
+    assert refresher.try_lead()
+    assert not follower.try_lead()
+    assert follower.read() is None
+
+    snapshot = make_snapshot(7)
+    refresher.write(snapshot)
+    # The writer does not re-read its own file
+    assert refresher.read() is None
+
+    version, created_at, table = follower.read()
+    assert version == 7
+    assert abs((created_at - snapshot.created_at).total_seconds()) < 1e-3
+    np.testing.assert_array_equal(table.rows, snapshot.table.rows)
+    assert table.records() == snapshot.table.records()
+    # Rows are a read-only view onto the mapping rather than a copy
+    assert not table.rows.flags.writeable and not table.rows.flags.owndata
+    assert follower.read() is None
+
+    refresher.write(make_snapshot(8))
+    assert follower.read()[0] == 8
+    # The earlier mapping is still readable after the file was replaced
+    assert table.records()[0]["product"] == snapshot.table.records()[0]["product"]
+
+    refresher.release()
+    assert follower.try_lead()
+
+
+def test_sharing_turns_on_for_multiple_workers(monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    assert server.default_shared_snapshot_dir() == ""
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    assert server.default_shared_snapshot_dir().endswith("polymer-snapshot")
+
+    # uvicorn --workers N: each worker is a multiprocessing child
+    class Child:
+        @staticmethod
+        def parent_process():
+            return object()
+
+    monkeypatch.delenv("WEB_CONCURRENCY")
+    monkeypatch.setitem(server.sys.modules, "multiprocessing", Child)
+    assert server.default_shared_snapshot_dir().endswith("polymer-snapshot")